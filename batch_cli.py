@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from typing import Iterable, Iterator, TextIO
+
+import numpy as np
+
+from convergence import ConvergenceMonitor
+from feasibility import check_feasibility
+from initial_theta import INITS, get_random_initial_theta
+from runner import REJECTED
+from solvers import METHODS
+from theta_kernel import get_exact_omega
+
+# допустимое отклонение суммы omega от единицы: большее отклонение считается ошибкой во входных данных
+OMEGA_TOLERANCE = 10 ** (-9)
+# параметры, которые можно задать как глобально (аргументами командной строки), так и для отдельной задачи
+OPTIONS = ("method", "init", "eps", "max_it", "seed")
+
+
+def solve_problem(problem: dict, defaults: dict, prescreen: bool, with_theta: bool) -> dict:
+    """
+    Решение одной задачи вида {"id": ..., "omega": [...], "w": [[...]], "method": ..., "init": ..., ...}.
+    Параметры, не заданные в задаче, берутся из defaults. Вектор omega должен быть положительным
+    с суммой, равной единице с точностью OMEGA_TOLERANCE; в пределах этой точности последний элемент
+    поправляется так, чтобы сумма в точности равнялась единице. Некорректная задача приводит к исключению.
+
+    Returns:
+        Результат: id, status ("ok" или "error"), причина завершения, число итераций, последняя ошибка,
+        наибольшая невязка, время решения и (если with_theta) маршрутная матрица.
+    """
+    result = {"id": problem.get("id")}
+    options = {key: problem.get(key, defaults[key]) for key in OPTIONS}
+    omega = np.asarray(problem["omega"], dtype=float)
+    if omega.ndim != 1 or not np.all(np.isfinite(omega)) or not np.all(omega > 0):
+        raise ValueError("omega должен быть вектором положительных чисел")
+    if abs(sum(omega) - 1) > OMEGA_TOLERANCE:
+        raise ValueError(f"сумма omega равна {float(sum(omega))}, а не единице")
+    omega = get_exact_omega(omega)
+    w = np.asarray(problem["w"], dtype=float)
+    if w.shape != (len(omega), len(omega)):
+        raise ValueError(f"размерность w {w.shape} не соответствует omega ({len(omega)})")
+    method = METHODS[options["method"]]
+    get_initial_theta = INITS[options["init"]]
+    if options["init"] == "random":
+        get_initial_theta = partial(get_random_initial_theta, seed=options["seed"])
+
+    start = time.perf_counter()
+    if prescreen and check_feasibility(omega, w, options["eps"]) is not None:
+        return {**result, "status": "ok", "reason": REJECTED, "it": 0, "time": time.perf_counter() - start}
+
+    theta, out_omega, errors, it, reason = method(omega, w, get_initial_theta, eps=options["eps"],
+                                                  max_it=options["max_it"], monitor=ConvergenceMonitor(),
+                                                  return_reason=True)
+    result.update({
+        "status": "ok",
+        "reason": reason,
+        "it": it,
+        "final_error": errors[-1] if errors else 0.,
+        "residual": float(np.abs(out_omega - omega).max()),
+        "time": time.perf_counter() - start,
+    })
+    if with_theta:
+        result["theta"] = theta.tolist()
+
+    return result
+
+
+def read_problems(lines: Iterable[str]) -> Iterator[dict]:
+    """Разбор задач из строк JSON Lines; пустые строки пропускаются, номер строки используется как id по умолчанию."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            problem = json.loads(line)
+            if not isinstance(problem, dict):
+                raise ValueError("строка должна содержать JSON-объект")
+        except ValueError as error:
+            problem = {"id": number, "invalid": str(error)}
+        problem.setdefault("id", number)
+        yield problem
+
+
+def _solve_or_reject(problem: dict, defaults: dict, prescreen: bool, with_theta: bool) -> dict:
+    # ошибка в одной задаче не должна останавливать обработку остальных
+    if "invalid" in problem:
+        return {"id": problem["id"], "status": "error", "message": problem["invalid"]}
+    try:
+        return solve_problem(problem, defaults, prescreen, with_theta)
+    except Exception as error:
+        return {"id": problem["id"], "status": "error", "message": f"{type(error).__name__}: {error}"}
+
+
+def run_batch(problems: Iterable[dict],
+              output: TextIO,
+              defaults: dict,
+              workers: int = None,
+              queue_size: int = None,
+              prescreen: bool = False,
+              with_theta: bool = True) -> dict[str, int]:
+    """
+    Потоковое решение задач в пуле процессов. Одновременно в работе находится не более queue_size задач:
+    следующая задача читается из входа только после завершения одной из текущих, поэтому память
+    не зависит от объёма входных данных. Результаты записываются по мере готовности (порядок может
+    отличаться от порядка задач, соответствие устанавливается по id).
+
+    Returns:
+        Число результатов по статусам и причинам завершения.
+    """
+    workers = workers or os.cpu_count()
+    queue_size = queue_size or 2 * workers
+    counts = {}
+
+    def write(result):
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+        key = result.get("reason", result["status"])
+        counts[key] = counts.get(key, 0) + 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for problem in problems:
+            if len(pending) >= queue_size:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+            pending.add(executor.submit(_solve_or_reject, problem, defaults, prescreen, with_theta))
+
+        for future in wait(pending).done:
+            write(future.result())
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Пакетное формирование маршрутных матриц: задачи (omega, w) в формате JSON Lines "
+                    "читаются из файла или stdin, результаты построчно выводятся по мере готовности")
+    parser.add_argument("input", nargs="?", default="-", help="файл с задачами, по умолчанию stdin")
+    parser.add_argument("-o", "--output", default="-", help="файл результатов, по умолчанию stdout")
+    parser.add_argument("--method", choices=sorted(METHODS), default="conjugate")
+    parser.add_argument("--init", choices=sorted(INITS), default="uniform")
+    parser.add_argument("--eps", type=float, default=10 ** (-10))
+    parser.add_argument("--max-it", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=0, help="зерно случайной начальной матрицы (init=random)")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов, по умолчанию os.cpu_count()")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="наибольшее число задач в работе, по умолчанию 2 * workers")
+    parser.add_argument("--prescreen", action="store_true", help="отбрасывать задачи без решения (check_feasibility)")
+    parser.add_argument("--no-theta", action="store_true", help="не выводить маршрутные матрицы")
+    args = parser.parse_args()
+
+    defaults = {"method": args.method, "init": args.init, "eps": args.eps, "max_it": args.max_it, "seed": args.seed}
+    source = sys.stdin if args.input == "-" else open(args.input)
+    target = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        counts = run_batch(read_problems(source), target, defaults, args.workers, args.queue_size,
+                           args.prescreen, not args.no_theta)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    print(", ".join(f"{key}: {count}" for key, count in counts.items()), file=sys.stderr)
+    return 1 if "error" in counts else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
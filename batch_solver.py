@@ -0,0 +1,119 @@
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+from theta_kernel import shift_negative
+
+METHODS = ("gradient", "conjugate")
+
+
+def solve_batch(omegas: ndarray,
+                ws: ndarray,
+                get_initial_theta: Callable,
+                method: str = "gradient",
+                eps: float = 10 ** (-10),
+                max_it: int = 2_000) -> tuple[ndarray, ndarray, ndarray, ndarray]:
+    """
+    Функция, формирующая маршрутные матрицы сразу для набора задач (omega, w) одной размерности.
+    Итерации выполняются трёхмерными операциями над всеми ещё не сошедшимися задачами;
+    сошедшиеся задачи исключаются из вычислений.
+
+    Parameters:
+        omegas: массив векторов относительных интенсивностей потоков размерности (B, n)
+        ws: массив матриц смежности размерности (B, n, n)
+        get_initial_theta: функция для определения начальной маршрутной матрицы
+        method: "gradient" - метод градиентного спуска, "conjugate" - метод сопряженных градиентов
+        eps: точность определения вектора omega уравнением omega = omega * theta
+        max_it: максимальное число итераций для каждой задачи
+
+    Returns:
+        Полученные маршрутные матрицы (B, n, n);
+        Соответствующие векторы интенсивностей потоков (B, n);
+        Число пройденных итераций для каждой задачи (B,);
+        Признаки сходимости для каждой задачи (B,).
+
+    """
+
+    assert method in METHODS, f"Неизвестный метод: {method}."
+    omegas = np.asarray(omegas, dtype=float)
+    ws = np.asarray(ws)
+    assert omegas.ndim == 2 and ws.shape == omegas.shape + omegas.shape[-1:], "Несогласованные размерности omegas и ws."
+    # суммы накапливаются последовательно, как встроенная sum в одиночных методах (np.sum суммирует попарно)
+    assert np.all(np.cumsum(omegas, axis=1)[:, -1] == 1), "Сумма каждого вектора omega должна равняться единицы."
+
+    thetas = np.stack([get_initial_theta(w, omega) for w, omega in zip(ws, omegas)]).astype(float)
+    free = (thetas != 0) & (thetas != 1)
+
+    out_omegas = _product(omegas, thetas)
+    delta_prev = out_omegas - omegas
+    its = np.zeros(len(omegas), dtype=int)
+    active = _has_residual(out_omegas, omegas, eps)
+
+    while active.any():
+        index = np.flatnonzero(active & (its < max_it))
+        if not index.size:
+            break
+        its[index] += 1
+
+        omega, theta, mask = omegas[index], thetas[index], free[index]
+        out_omega = _product(omega, theta)
+        delta = out_omega - omega
+        weight_deltas = omega[:, :, None] * delta[:, None, :]
+
+        if method == "conjugate":
+            prev = delta_prev[index]
+            beta = np.sum(delta * delta, axis=1) / np.sum(prev * prev, axis=1)
+            p = delta + beta[:, None] * delta
+            weight_deltas[~mask] = 0
+            direction = np.where(mask, p[:, None, :], 0)
+            alpha = _find_alpha(theta - weight_deltas, omega, -direction)
+            weight_deltas += alpha[:, None, None] * direction
+            delta_prev[index] = delta
+
+        np.subtract(theta, weight_deltas, out=theta, where=mask)
+        _shift_negative(theta, mask)
+        theta /= np.cumsum(theta, axis=2)[:, :, -1:]
+
+        thetas[index] = theta
+        out_omegas[index] = out_omega
+        active[index] = _has_residual(out_omega, omega, eps)
+
+    return thetas, out_omegas, its, ~_has_residual(out_omegas, omegas, eps)
+
+
+def _product(omegas: ndarray, thetas: ndarray) -> ndarray:
+    return np.matmul(omegas[:, None, :], thetas)[:, 0, :]
+
+
+def _has_residual(out_omegas: ndarray, omegas: ndarray, eps: float) -> ndarray:
+    return np.any(np.abs(out_omegas - omegas) > eps, axis=1)
+
+
+def _find_alpha(theta: ndarray, omega: ndarray, p: ndarray) -> ndarray:
+    """Пакетный аналог conjugate_gradient.find_alpha: точный шаг вдоль направлений p для всех задач сразу."""
+    residual = _product(omega, theta) - omega
+    slope = _product(omega, p)
+    curvature = np.sum(slope * slope, axis=1)
+    alpha = np.divide(-np.sum(residual * slope, axis=1), curvature, out=np.zeros_like(curvature), where=curvature != 0)
+    return np.maximum(alpha, 0)
+
+
+def _shift_negative(thetas: ndarray, free: ndarray) -> None:
+    """Пакетный вариант theta_kernel.shift_negative."""
+    batch = len(thetas)
+    flat, flat_free = thetas.reshape(batch, -1), free.reshape(batch, -1)
+    negative = flat.min(axis=1) < 0
+    if not negative.any():
+        return
+
+    floor = np.where(flat_free, np.inf, flat).min(axis=1)
+    simple = negative & (floor <= 0)
+    if simple.any():
+        values = np.where(flat_free[simple], flat[simple], np.inf)
+        suffix = np.minimum.accumulate(values[:, ::-1], axis=1)[:, ::-1]
+        shifted = flat[simple] + np.abs(np.minimum(suffix, floor[simple, None])) * 2
+        flat[simple] = np.where(flat_free[simple], shifted, flat[simple])
+
+    for b in np.flatnonzero(negative & (floor > 0)):
+        shift_negative(thetas[b], free[b])
@@ -0,0 +1,417 @@
+import os
+import random
+import time
+import tracemalloc
+
+import numpy as np
+from numpy import ndarray
+
+from batch_solver import solve_batch
+from benchmark_suite import get_problem
+from conjugate_gradient import conjugate
+from decomposition import decomposed, get_pool
+from feasibility import check_feasibility
+from generators import get_random_w
+from gradient_descent import gradient_descent
+from initial_theta import get_smart_initial_theta, get_uniform_initial_theta
+from jit_backend import NUMBA_AVAILABLE, solve_with_kernel
+from optimizers import Adam, BarzilaiBorwein, FixedStep, Nesterov, RMSProp
+from racing import RaceStats, get_strategies, get_topology_class, race
+from sparse_solver import get_random_sparse_w, sparse_conjugate, sparse_gradient_descent
+from theta_kernel import apply_update, get_free_mask, normalize_rows, shift_negative
+from theta_solver import ThetaSolver
+from warm_start import WarmStartSolver
+
+
+def _loop_step(theta: ndarray, weight_deltas: ndarray, fixed: set) -> None:
+    """Шаг обновления маршрутной матрицы в исходном поэлементном виде (для сравнения)."""
+    row_count, col_count = theta.shape[0], theta.shape[1]
+    for i in range(row_count):
+        for j in range(col_count):
+            if (i, j) in fixed:
+                weight_deltas[i][j] = 0
+
+    theta -= weight_deltas
+
+    if np.min(theta) < 0:
+        for i in range(row_count):
+            for j in range(col_count):
+                if (i, j) not in fixed:
+                    theta[i][j] += (abs(np.min(theta)) * 2)
+
+    for i in range(row_count):
+        s = sum(theta[i])
+        for j in range(col_count):
+            theta[i][j] /= s
+
+
+def _vector_step(theta: ndarray, weight_deltas: ndarray, free: ndarray) -> None:
+    apply_update(theta, weight_deltas, free)
+    shift_negative(theta, free)
+    normalize_rows(theta)
+
+
+def _grid_find_alpha(theta, inp, p):
+    alpha, min_f = float("inf"), float("inf")
+    for a in np.arange(0, 1, 0.01):
+        w = np.copy(theta)
+        w += a * p
+        out = inp.dot(w)
+        f = sum([(o - i) ** 2 for o, i in zip(out, inp)]) / 2
+        if f < min_f:
+            min_f = f
+            alpha = a
+
+    return alpha
+
+
+def _grid_conjugate(omega: ndarray, w: ndarray, get_initial_theta, eps: float = 10 ** (-10), max_it: int = 2_000) -> int:
+    """Метод сопряженных градиентов с прежним перебором alpha по сетке (для сравнения), возвращает число итераций."""
+    theta = get_initial_theta(w, omega)
+    free = get_free_mask(theta)
+    it = 0
+    out_omega = omega.dot(theta)
+    while np.any(np.abs(out_omega - omega) > eps) and it < max_it:
+        it += 1
+        delta_prev = out_omega - omega
+        out_omega = omega.dot(theta)
+        delta = out_omega - omega
+        error = sum(map(lambda x: x ** 2, delta)) / 2
+        alpha = _grid_find_alpha(theta, omega, error)
+        beta = delta.dot(delta) / delta_prev.dot(delta_prev)
+        p = delta + beta * delta
+        weight_deltas = alpha * (p + theta) + np.outer(omega, delta)
+        _vector_step(theta, weight_deltas, free)
+
+    return it
+
+
+def _random_problem(n: int, density: float, rng: np.random.Generator) -> tuple[ndarray, ndarray, ndarray]:
+    w = (rng.random((n, n)) < density).astype(float)
+    w[np.arange(n), rng.integers(0, n, n)] = 1
+    theta = w / w.sum(axis=1, keepdims=True)
+    omega = rng.random(n)
+    omega /= omega.sum()
+    # крупный шаг, чтобы в матрице гарантированно появились отрицательные элементы
+    weight_deltas = np.outer(omega, omega.dot(theta) - omega) * n + rng.normal(0, 1 / n, (n, n))
+    return theta, weight_deltas, omega
+
+
+def bench_kernel(sizes=(4, 8, 16, 32, 64, 128), density: float = 0.5, repeat: int = 3, seed: int = 0):
+    """
+    Сравнение времени одной итерации (маскирование, изменение, сдвиг, нормализация)
+    в поэлементной и векторизованной реализации. Заодно проверяется совпадение результатов.
+    """
+    rng = np.random.default_rng(seed)
+    print(f"{'n':>6} {'loop, ms':>12} {'vector, ms':>12} {'speedup':>10} {'equal':>6}")
+    for n in sizes:
+        theta, weight_deltas, _ = _random_problem(n, density, rng)
+        fixed = {(i, j) for i, j in zip(*np.nonzero((theta == 0) | (theta == 1)))}
+        free = get_free_mask(theta)
+
+        loop_time, vector_time = float("inf"), float("inf")
+        for _ in range(repeat):
+            loop_theta = theta.copy()
+            start = time.perf_counter()
+            _loop_step(loop_theta, weight_deltas.copy(), fixed)
+            loop_time = min(loop_time, time.perf_counter() - start)
+
+            vector_theta = theta.copy()
+            start = time.perf_counter()
+            _vector_step(vector_theta, weight_deltas.copy(), free)
+            vector_time = min(vector_time, time.perf_counter() - start)
+
+        equal = np.array_equal(loop_theta, vector_theta)
+        print(f"{n:>6} {loop_time * 1e3:>12.3f} {vector_time * 1e3:>12.3f} "
+              f"{loop_time / vector_time:>10.1f} {str(equal):>6}")
+
+
+def bench_batch(batch: int = 100, n: int = 4, max_it: int = 500, seed: int = 0):
+    """Сравнение пакетного решения solve_batch с последовательными вызовами одиночных методов."""
+    rng = np.random.default_rng(seed)
+    ws = (rng.random((batch, n, n)) < 0.5).astype(float)
+    ws[np.arange(batch)[:, None], np.arange(n), rng.integers(0, n, (batch, n))] = 1
+    omega = np.array([.35, .27, .15, .23]) if n == 4 else np.full(n, 1 / n)
+    omegas = np.tile(omega, (batch, 1))
+
+    print(f"{'method':>10} {'single, s':>10} {'batch, s':>10} {'speedup':>10} {'its equal':>10}")
+    for method, solver in (("gradient", gradient_descent), ("conjugate", conjugate)):
+        start = time.perf_counter()
+        single_its = [solver(omega, w, get_uniform_initial_theta, max_it=max_it)[3] for w in ws]
+        single_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        _, _, its, _ = solve_batch(omegas, ws, get_uniform_initial_theta, method, max_it=max_it)
+        batch_time = time.perf_counter() - start
+
+        print(f"{method:>10} {single_time:>10.3f} {batch_time:>10.3f} {single_time / batch_time:>10.1f} "
+              f"{np.mean(its == np.array(single_its)):>10.1%}")
+
+
+def bench_line_search(count: int = 40, max_it: int = 2_000, seed: int = 0):
+    """Сравнение метода сопряженных градиентов с точным поиском шага и с прежним перебором по сетке."""
+    random.seed(seed)
+    omega = np.array([.35, .27, .15, .23])
+    ws = [get_random_w(len(omega)) for _ in range(count)]
+
+    print(f"{'line search':>12} {'time, s':>10} {'converged':>10} {'mean its':>10}")
+    for name, solve in (("grid", lambda w: _grid_conjugate(omega, w, get_uniform_initial_theta, max_it=max_it)),
+                        ("exact", lambda w: conjugate(omega, w, get_uniform_initial_theta, max_it=max_it)[3])):
+        start = time.perf_counter()
+        its = np.array([solve(w) for w in ws])
+        elapsed = time.perf_counter() - start
+        converged = its < max_it
+        print(f"{name:>12} {elapsed:>10.2f} {converged.sum():>10} {its[converged].mean():>10.1f}")
+
+
+def bench_sparse(sizes=(100, 500, 2_000, 10_000, 50_000), degree: int = 3, max_it: int = 20, max_dense: int = 2_000):
+    """Время итерации плотной и разреженной реализаций на разреженных топологиях (плотная - до max_dense узлов)."""
+    rng = np.random.default_rng(0)
+    print(f"{'n':>7} {'method':>10} {'dense, ms/it':>13} {'sparse, ms/it':>14}")
+    for n in sizes:
+        w = get_random_sparse_w(n, degree, seed=n)
+        omega = rng.random(n)
+        omega /= omega.sum()
+        dense_omega = omega.copy()
+        # плотные методы требуют точного равенства суммы единице
+        dense_omega[-1] = 1 - sum(dense_omega[:-1])
+        for method, dense, sparse in (("gradient", gradient_descent, sparse_gradient_descent),
+                                      ("conjugate", conjugate, sparse_conjugate)):
+            dense_time = float("nan")
+            if n <= max_dense and sum(dense_omega) == 1:
+                start = time.perf_counter()
+                _, _, _, it = dense(dense_omega, w.toarray(), get_uniform_initial_theta, max_it=max_it)
+                dense_time = (time.perf_counter() - start) / it
+
+            start = time.perf_counter()
+            _, _, _, it = sparse(omega, w, max_it=max_it)
+            sparse_time = (time.perf_counter() - start) / it
+            print(f"{n:>7} {method:>10} {dense_time * 1e3:>13.3f} {sparse_time * 1e3:>14.3f}")
+
+
+def bench_warm_start(steps: int = 30, scale: float = 0.005, seed: int = 0):
+    """Сравнение числа итераций при холодном и тёплом старте для последовательности слегка изменяющихся omega."""
+    random.seed(seed)
+    rng = np.random.default_rng(seed)
+    omega = np.array([.35, .27, .15, .23])
+    w = get_random_w(len(omega))
+    while gradient_descent(omega, w, get_uniform_initial_theta)[3] == 2_000:
+        w = get_random_w(len(omega))
+
+    omegas = []
+    while len(omegas) < steps:
+        candidate = omega + rng.normal(0, scale, len(omega))
+        candidate[-1] = 1 - sum(candidate[:-1])
+        if sum(candidate) == 1 and candidate.min() > 0:
+            omega = candidate
+            omegas.append(candidate)
+
+    print(f"{'method':>16} {'cold its':>10} {'warm its':>10} {'cold, s':>8} {'warm, s':>8}")
+    for name, method in (("gradient", gradient_descent), ("conjugate", conjugate)):
+        solver = WarmStartSolver(w, name)
+        cold_its, warm_its, cold_time, warm_time = [], [], 0., 0.
+        for omega in omegas:
+            start = time.perf_counter()
+            cold_its.append(method(omega, w, get_uniform_initial_theta)[3])
+            cold_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            warm_its.append(solver.solve(omega)[3])
+            warm_time += time.perf_counter() - start
+
+        print(f"{name:>16} {np.mean(cold_its):>10.1f} {np.mean(warm_its):>10.1f} "
+              f"{cold_time:>8.3f} {warm_time:>8.3f}")
+
+
+def bench_optimizers(count: int = 40, max_it: int = 2_000, seed: int = 0):
+    """Число итераций метода градиентного спуска до достижения eps для разных стратегий шага."""
+    random.seed(seed)
+    omega = np.array([.35, .27, .15, .23])
+    ws = []
+    while len(ws) < count:
+        w = get_random_w(len(omega))
+        if check_feasibility(omega, w) is None:
+            ws.append(w)
+
+    optimizers = {"current": None, "fixed(4)": FixedStep(4.), "nesterov": Nesterov(), "rmsprop": RMSProp(),
+                  "adam": Adam(), "bb": BarzilaiBorwein()}
+    print(f"{'optimizer':>10} {'converged':>10} {'mean its':>10} {'time, s':>8}")
+    for name, optimizer in optimizers.items():
+        start = time.perf_counter()
+        its = np.array([gradient_descent(omega, w, get_uniform_initial_theta, max_it=max_it, optimizer=optimizer)[3]
+                        for w in ws])
+        elapsed = time.perf_counter() - start
+        converged = its < max_it
+        print(f"{name:>10} {converged.sum():>10} {its[converged].mean():>10.1f} {elapsed:>8.2f}")
+
+
+def bench_workspace(sizes=(4, 16, 64), count: int = 20, max_it: int = 2_000, seed: int = 0):
+    """
+    Сравнение функциональных методов и ThetaSolver с заранее выделенными рабочими массивами:
+    суммарное время count решений, пиковая память одного решения и совпадение результатов.
+    """
+    rng = np.random.default_rng(seed)
+    print(f"{'n':>5} {'method':>10} {'function, s':>12} {'solver, s':>10} {'function, KiB':>14} "
+          f"{'solver, KiB':>12} {'equal':>6}")
+    for n in sizes:
+        problems = [get_problem(n, 0.5, 0., rng) for _ in range(count)]
+
+        for method, function in (("gradient", gradient_descent), ("conjugate", conjugate)):
+            solver = ThetaSolver(n, method, max_it=max_it)
+            start = time.perf_counter()
+            expected = [function(omega, w, get_uniform_initial_theta, max_it=max_it) for omega, w in problems]
+            function_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = [solver.solve(omega, w, get_uniform_initial_theta) for omega, w in problems]
+            solver_time = time.perf_counter() - start
+
+            peaks = []
+            for solve in (lambda: function(*problems[0], get_uniform_initial_theta, max_it=max_it),
+                          lambda: solver.solve(*problems[0], get_uniform_initial_theta)):
+                tracemalloc.start()
+                solve()
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+            equal = all(np.array_equal(a[0], b[0], equal_nan=True) and a[3] == b[3] for a, b in zip(expected, actual))
+            print(f"{n:>5} {method:>10} {function_time:>12.3f} {solver_time:>10.3f} {peaks[0] / 1024:>14.1f} "
+                  f"{peaks[1] / 1024:>12.1f} {str(equal):>6}")
+
+
+def _block_problem(blocks: int, size: int, rng: np.random.Generator) -> tuple[ndarray, ndarray]:
+    """Сеть из blocks компонент сильной связности по size узлов, соединённых цепочкой маршрутов между компонентами."""
+    n = blocks * size
+    w = np.zeros((n, n))
+    omega = np.empty(n)
+    for block in range(blocks):
+        part = slice(block * size, (block + 1) * size)
+        omega[part], w[part, part] = get_problem(size, 0.5, 0., rng)
+        if block:
+            w[(block - 1) * size, block * size] = 1
+    omega /= blocks
+    omega[-1] = 1 - sum(omega[:-1])
+    return omega, w
+
+
+def bench_decomposition(block_counts=(1, 2, 4, 8), size: int = 48, max_it: int = 2_000, seed: int = 0):
+    """
+    Время решения сети из нескольких компонент сильной связности: целиком, по компонентам последовательно
+    и по компонентам в общем пуле процессов decomposition.get_pool (создаётся до замеров и используется повторно).
+    Для каждого варианта выводится невязка. Ускорение пула ограничено числом процессоров.
+    """
+    rng = np.random.default_rng(seed)
+    print(f"процессоров: {os.cpu_count()}")
+    print(f"{'blocks':>7} {'method':>16} {'whole, s':>9} {'residual':>9} {'serial, s':>10} {'pool, s':>8} "
+          f"{'speedup':>8} {'residual':>9}")
+    for blocks in block_counts:
+        omega, w = _block_problem(blocks, size, rng)
+        # прогрев процессов пула
+        list(get_pool(blocks).map(abs, range(blocks)))
+        for method in (gradient_descent, conjugate):
+            start = time.perf_counter()
+            _, whole_omega, _, _ = method(omega, w, get_uniform_initial_theta, max_it=max_it)
+            whole_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            decomposed(omega, w, get_uniform_initial_theta, max_it=max_it, method=method, workers=1)
+            serial_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _, out_omega, _, _ = decomposed(omega, w, get_uniform_initial_theta, max_it=max_it, method=method,
+                                            workers=blocks)
+            pool_time = time.perf_counter() - start
+
+            print(f"{blocks:>7} {method.__name__:>16} {whole_time:>9.3f} {np.abs(whole_omega - omega).max():>9.1e} "
+                  f"{serial_time:>10.3f} {pool_time:>8.3f} {serial_time / pool_time:>8.1f} "
+                  f"{np.abs(out_omega - omega).max():>9.1e}")
+
+
+def bench_racing(count: int = 20, max_it: int = 2_000, seed: int = 0):
+    """
+    Сравнение последовательного решения обоими методами с обеими начальными матрицами (как в main.general),
+    последовательного перебора тех же стратегий до первого сошедшегося запуска и гонки стратегий racing.race,
+    которая останавливается на первом сошедшемся запуске.
+    """
+    random.seed(seed)
+    omega = np.array([.35, .27, .15, .23])
+    ws = []
+    while len(ws) < count:
+        w = get_random_w(len(omega))
+        if check_feasibility(omega, w) is None:
+            ws.append(w)
+
+    start = time.perf_counter()
+    sequential = 0
+    for w in ws:
+        converged = [method(omega, w, init, max_it=max_it)[3] < max_it
+                     for method in (gradient_descent, conjugate)
+                     for init in (get_uniform_initial_theta, get_smart_initial_theta)]
+        sequential += any(converged)
+    sequential_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first = 0
+    for w in ws:
+        for method, init in get_strategies(perturbations=0).values():
+            if method(omega, w, init, max_it=max_it)[3] < max_it:
+                first += 1
+                break
+    first_time = time.perf_counter() - start
+
+    stats = RaceStats()
+    start = time.perf_counter()
+    for w in ws:
+        stats.update(get_topology_class(w), race(omega, w, get_strategies(perturbations=0), max_it=max_it)[4])
+    race_time = time.perf_counter() - start
+
+    print(f"{'mode':>10} {'solved':>7} {'time, s':>8}")
+    print(f"{'sequential':>10} {sequential:>7} {sequential_time:>8.2f}")
+    print(f"{'first':>10} {first:>7} {first_time:>8.2f}")
+    print(f"{'race':>10} {sum(sum(wins.values()) for wins in stats.wins.values()):>7} {race_time:>8.2f}")
+    print(stats)
+
+
+def bench_jit(sizes=(4, 8), count: int = 10, max_it: int = 500, seed: int = 0):
+    """
+    Проверка ядер jit_backend на совпадение с методами NumPy (число итераций, наибольшее отличие theta
+    и ошибок) и сравнение времени. Без numba ядра выполняются на Python, поэтому их время не показательно.
+    """
+    rng = np.random.default_rng(seed)
+    print(f"numba: {'доступна' if NUMBA_AVAILABLE else 'не установлена'}")
+    print(f"{'n':>4} {'method':>10} {'its equal':>10} {'theta diff':>11} {'error diff':>11} "
+          f"{'numpy, s':>9} {'kernel, s':>10}")
+    for n in sizes:
+        problems = [get_problem(n, 0.5, 0., rng) for _ in range(count)]
+        for method, reference in (("gradient", gradient_descent), ("conjugate", conjugate)):
+            # первый вызов компилирует ядро
+            solve_with_kernel(method, *problems[0], get_uniform_initial_theta, max_it=1)
+
+            start = time.perf_counter()
+            expected = [reference(omega, w, get_uniform_initial_theta, max_it=max_it) for omega, w in problems]
+            numpy_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = [solve_with_kernel(method, omega, w, get_uniform_initial_theta, max_it=max_it)
+                      for omega, w in problems]
+            kernel_time = time.perf_counter() - start
+
+            its_equal = np.mean([a[3] == b[3] for a, b in zip(expected, actual)])
+            theta_diff = max(np.abs(a[0] - b[0]).max() for a, b in zip(expected, actual))
+            error_diff = max(np.abs(np.subtract(a[2], b[2])).max(initial=0.)
+                             for a, b in zip(expected, actual) if a[3] == b[3])
+            print(f"{n:>4} {method:>10} {its_equal:>10.0%} {theta_diff:>11.1e} {error_diff:>11.1e} "
+                  f"{numpy_time:>9.3f} {kernel_time:>10.3f}")
+
+
+if __name__ == '__main__':
+    bench_kernel()
+    bench_batch()
+    bench_line_search()
+    bench_sparse()
+    bench_warm_start()
+    bench_optimizers()
+    bench_workspace()
+    bench_decomposition()
+    bench_racing()
+    bench_jit()
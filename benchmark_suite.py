@@ -0,0 +1,176 @@
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+from numpy import ndarray
+
+from feasibility import check_feasibility
+from initial_theta import DETERMINISTIC_INITS, INITS
+from solvers import METHODS
+
+# метрики, рост которых считается регрессией
+COMPARED = ("time_per_it", "iterations")
+
+
+def get_skewed_omega(n: int, skew: float, rng: np.random.Generator) -> ndarray:
+    """Вектор omega с весами (k + 1)^(-skew) в случайном порядке, сумма которого в точности равна единице."""
+    while True:
+        omega = rng.permutation(np.arange(1, n + 1) ** -float(skew)) * rng.uniform(0.9, 1.1, n)
+        omega /= omega.sum()
+        omega[-1] = 1 - sum(omega[:-1])
+        if sum(omega) == 1 and omega.min() > 0:
+            return omega
+
+
+def get_problem(n: int, density: float, skew: float, rng: np.random.Generator) -> tuple[ndarray, ndarray]:
+    """Случайная задача (omega, w), прошедшая предварительную проверку feasibility.check_feasibility."""
+    omega = get_skewed_omega(n, skew, rng)
+    while True:
+        w = (rng.random((n, n)) < density).astype(float)
+        w[np.arange(n), rng.integers(0, n, n)] = 1
+        if check_feasibility(omega, w) is None:
+            return omega, w
+
+
+def run_case(omega: ndarray, w: ndarray, method: str, init: str, max_it: int, eps: float, repeat: int) -> dict:
+    """Замер одного решения: лучшее время из repeat запусков, число итераций и пиковая память."""
+    wall_time = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, _, _, it = METHODS[method](omega, w, INITS[init], eps=eps, max_it=max_it)
+        wall_time = min(wall_time, time.perf_counter() - start)
+
+    # память измеряется отдельным полным запуском с тем же max_it, так как tracemalloc заметно замедляет вычисления
+    tracemalloc.start()
+    METHODS[method](omega, w, INITS[init], eps=eps, max_it=max_it)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"wall_time": wall_time, "it": it, "converged": it < max_it, "peak_memory": peak}
+
+
+def run_suite(sizes=(4, 8, 16, 64, 256),
+              densities=(0.2, 0.6),
+              skews=(0.0, 1.0),
+              problems: int = 5,
+              max_it: int = 2_000,
+              eps: float = 10 ** (-10),
+              repeat: int = 3,
+              seed: int = 0) -> dict:
+    """
+    Набор замеров для всех методов и детерминированных начальных матриц по сетке (n, плотность, неравномерность omega).
+    Для каждой точки сетки решаются одни и те же problems задач, время каждого решения - лучшее из repeat запусков.
+
+    Returns:
+        Словарь с описанием окружения ("meta") и списком замеров ("results").
+    """
+
+    rng = np.random.default_rng(seed)
+    results = []
+    for n in sizes:
+        for density in densities:
+            for skew in skews:
+                cases = [get_problem(n, density, skew, rng) for _ in range(problems)]
+                for method in METHODS:
+                    for init in DETERMINISTIC_INITS:
+                        runs = [run_case(omega, w, method, init, max_it, eps, repeat) for omega, w in cases]
+                        its = np.array([run["it"] for run in runs])
+                        converged = np.array([run["converged"] for run in runs])
+                        wall_time = sum(run["wall_time"] for run in runs)
+                        result = {
+                            "n": n, "density": density, "skew": skew, "method": method, "init": init,
+                            "wall_time": wall_time,
+                            "time_per_it": wall_time / max(its.sum(), 1),
+                            "iterations": float(its[converged].mean()) if converged.any() else None,
+                            "peak_memory": max(run["peak_memory"] for run in runs),
+                            "convergence_rate": float(converged.mean()),
+                        }
+                        results.append(result)
+                        print(format_result(result))
+
+    meta = {"seed": seed, "problems": problems, "max_it": max_it, "eps": eps, "repeat": repeat,
+            "python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine()}
+    return {"meta": meta, "results": results}
+
+
+def format_result(result: dict) -> str:
+    iterations = "-" if result["iterations"] is None else f"{result['iterations']:.1f}"
+    return (f"n={result['n']:<5} density={result['density']:<4} skew={result['skew']:<4} "
+            f"{result['method']:>10} {result['init']:>7}: {result['wall_time']:8.3f} s, "
+            f"{result['time_per_it'] * 1e3:8.4f} ms/it, its {iterations:>7}, "
+            f"mem {result['peak_memory'] / 1024:8.1f} KiB, converged {result['convergence_rate']:.0%}")
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> list[str]:
+    """
+    Сравнение двух запусков набора замеров. Регрессией считается рост времени итерации
+    или числа итераций более чем на threshold, а также снижение доли сошедшихся задач.
+
+    Returns:
+        Список описаний найденных регрессий.
+    """
+
+    def key(result):
+        return result["n"], result["density"], result["skew"], result["method"], result["init"]
+
+    base = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = base.get(key(result))
+        if old is None:
+            continue
+
+        name = "n={} density={} skew={} {} {}".format(*key(result))
+        for metric in COMPARED:
+            if old[metric] and result[metric] and result[metric] > old[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {old[metric]:.6g} -> {result[metric]:.6g}")
+        if result["convergence_rate"] < old["convergence_rate"]:
+            regressions.append(f"{name}: convergence_rate {old['convergence_rate']:.0%} "
+                               f"-> {result['convergence_rate']:.0%}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Набор замеров производительности методов формирования маршрутной матрицы")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="выполнить замеры и сохранить их в JSON")
+    run.add_argument("--output", default="bench_output.json")
+    run.add_argument("--sizes", type=int, nargs="+", default=[4, 8, 16, 64, 256])
+    run.add_argument("--densities", type=float, nargs="+", default=[0.2, 0.6])
+    run.add_argument("--skews", type=float, nargs="+", default=[0.0, 1.0])
+    run.add_argument("--problems", type=int, default=5)
+    run.add_argument("--max-it", type=int, default=2_000)
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--seed", type=int, default=0)
+
+    diff = commands.add_parser("compare", help="сравнить два сохранённых запуска")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--threshold", type=float, default=0.2)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        report = run_suite(args.sizes, args.densities, args.skews, args.problems, args.max_it,
+                           repeat=args.repeat, seed=args.seed)
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+    regressions = compare(baseline, current, args.threshold)
+    for regression in regressions:
+        print(regression)
+    print(f"Регрессий: {len(regressions)}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+import copy
+import hashlib
+import os
+import pickle
+import random
+import time
+
+import numpy as np
+
+
+class Checkpoint:
+    """
+    Контрольная точка длительного эксперимента: состояние цикла (номер следующей задачи, накопленные списки
+    итераций и т.п.) сохраняется вместе с состоянием генераторов случайных чисел random и numpy.random,
+    поэтому продолженный запуск даёт тот же результат, что и запуск без прерывания.
+
+    Граница каждой завершённой задачи отмечается методом update: запоминаются длины списков состояния,
+    копии остальных (небольших, не растущих с числом задач) значений и состояние генераторов. Сериализация
+    выполняется только при записи на диск - не чаще, чем раз в interval секунд, и при выходе из блока with
+    (в том числе по Ctrl-C или из-за ошибки); списки при этом усекаются до длин на последней границе задачи.
+    Запись атомарна: файл заменяется целиком. После успешного завершения эксперимента файл удаляется (clear).
+
+    Контрольная точка хранит отпечаток входных данных эксперимента (fingerprint, см. get_fingerprint):
+    контрольная точка другого эксперимента не используется и удаляется.
+
+    Parameters:
+        filename: файл контрольной точки, None - контрольные точки не сохраняются
+        fingerprint: отпечаток входных данных эксперимента
+        interval: минимальный интервал между записями на диск в секундах
+    """
+
+    def __init__(self, filename: str | None, fingerprint: str = None, interval: float = 30.):
+        self.filename = filename
+        self.fingerprint = fingerprint
+        self.interval = interval
+        self._state = None
+        self._snapshot = None
+        self._saved = time.monotonic()
+
+    def restore(self, initial: dict) -> dict:
+        """
+        Загрузка сохранённого состояния и восстановление состояния генераторов случайных чисел.
+        Если контрольной точки нет или она относится к другому эксперименту, возвращается начальное состояние initial.
+        """
+        if self.filename is None or not os.path.exists(self.filename):
+            return initial
+
+        with open(self.filename, "rb") as file:
+            fingerprint, state, random_state, numpy_state = pickle.load(file)
+        if fingerprint != self.fingerprint:
+            print(f"Контрольная точка {self.filename} относится к другому эксперименту и не используется")
+            os.remove(self.filename)
+            return initial
+
+        random.setstate(random_state)
+        np.random.set_state(numpy_state)
+        print(f"Продолжение с контрольной точки {self.filename}")
+        return state
+
+    def update(self, state: dict) -> None:
+        """Отметка границы завершённой задачи; запись на диск, если прошло не менее interval секунд."""
+        if self.filename is None:
+            return
+
+        # списки только дополняются, поэтому для них достаточно длины; стоимость отметки не растёт с числом задач
+        lengths = {key: len(value) for key, value in state.items() if isinstance(value, list)}
+        others = copy.deepcopy({key: value for key, value in state.items() if not isinstance(value, list)})
+        self._state = state
+        self._snapshot = lengths, others, random.getstate(), np.random.get_state()
+        if time.monotonic() - self._saved >= self.interval:
+            self.save()
+
+    def save(self) -> None:
+        if self._snapshot is None:
+            return
+
+        lengths, others, random_state, numpy_state = self._snapshot
+        state = {**others, **{key: self._state[key][:length] for key, length in lengths.items()}}
+
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp = f"{self.filename}.tmp"
+        with open(temp, "wb") as file:
+            pickle.dump((self.fingerprint, state, random_state, numpy_state), file)
+        os.replace(temp, self.filename)
+        self._snapshot = None
+        self._saved = time.monotonic()
+
+    def clear(self) -> None:
+        """Удаление контрольной точки после завершения эксперимента."""
+        self._snapshot = None
+        if self.filename is not None and os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.save()
+        return False
+
+
+def get_fingerprint(*values) -> str:
+    """Отпечаток входных данных эксперимента: массивы numpy (в том числе внутри списков и кортежей) учитываются по содержимому."""
+    digest = hashlib.sha256()
+
+    def feed(value):
+        if isinstance(value, np.ndarray):
+            digest.update(f"ndarray{value.shape}{value.dtype}".encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, (list, tuple)):
+            digest.update(f"{type(value).__name__}{len(value)}".encode())
+            for item in value:
+                feed(item)
+        else:
+            digest.update(repr(value).encode())
+
+    feed(values)
+    return digest.hexdigest()
@@ -0,0 +1 @@
+# корневой conftest: pytest добавляет каталог проекта в sys.path, и тесты импортируют модули решателей напрямую
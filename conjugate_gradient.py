@@ -3,13 +3,23 @@ from typing import Callable
 import numpy as np
 from numpy import ndarray
 
+from convergence import STOPPED, ConvergenceMonitor, get_reason
+from profiling import SolverProfile
+from theta_kernel import apply_update, get_free_mask, has_residual, normalize_rows, shift_negative
+
 
 def conjugate(omega: ndarray,
               w: ndarray,
               get_initial_theta: Callable,
               eps: float = 10 ** (-10),
               log_step: int = 0,
-              max_it: int = 2_000) -> tuple[ndarray, ndarray, list[float], int]:
+              max_it: int = 2_000,
+              initial_theta: ndarray = None,
+              free: ndarray = None,
+              observer: SolverProfile = None,
+              monitor: ConvergenceMonitor = None,
+              should_stop: Callable[[], bool] = None,
+              return_reason: bool = False) -> tuple:
     """
     Функция, реализующая метод формирования маршрутной матрицы СеМо
     с заданным вектором относительных интенсивностей потоков
@@ -34,33 +44,48 @@ def conjugate(omega: ndarray,
         log_step: параметр, отвечающая за шаг логирование в процессе работы метода,
         если параметр равен 0 - логирование не производится, по умолчанию имеет значение 0
         max_it: максимальное число итераций, если решение не будет найдено, будет выведена приближенная матрица
+        initial_theta: начальная маршрутная матрица (например, решение для предыдущего вектора omega),
+        если задана, get_initial_theta не используется; сама матрица не изменяется
+        free: маска нефиксированных элементов, по умолчанию определяется по начальной маршрутной матрице
+        observer: наблюдатель (profiling.SolverProfile), получающий метрики итераций и время по фазам;
+        если не задан, измерения не производятся
+        monitor: наблюдатель за историей ошибки (convergence.ConvergenceMonitor), прерывающий метод при застое
+        или расхождении; причина завершения сохраняется в monitor.reason (и возвращается при return_reason=True)
+        should_stop: функция без аргументов, опрашиваемая в начале каждой итерации; если она вернула True,
+        метод завершается с текущей матрицей (например, для отмены из другого потока)
+        return_reason: если True, в результат добавляется причина завершения (константы convergence.py)
 
     Returns:
         Полученная маршрутная матрица;
         Соответствующий вектор интенсивностей потоков;
         Массив, содержащий значения ошибок в процессе формирования матрицы;
-        Число пройденных итераций.
+        Число пройденных итераций;
+        При return_reason=True - причина завершения: converged, max_it, stopped или причина, определённая monitor.
 
     """
 
     assert sum(omega) == 1, "Сумма вектора omega должна равняться единицы."
 
     # шаг 1.
-    theta = get_initial_theta(w, omega)
-    row_count, col_count = theta.shape[0], theta.shape[1]
+    theta = get_initial_theta(w, omega) if initial_theta is None else np.array(initial_theta, dtype=float)
 
     # шаг 2.
-    fixed = set()
-    for i in range(row_count):
-        for j in range(col_count):
-            # нулевые и единичные элементы фиксированы
-            if theta[i][j] == 0 or theta[i][j] == 1:
-                fixed |= {(i, j)}
+    if free is None:
+        free = get_free_mask(theta)
 
     it = 0
     errors = []
+    reason = None
     out_omega = omega.dot(theta)
-    while any(list(abs(x) > eps for x in out_omega - omega)) and it < max_it:
+    if observer is not None:
+        observer.start()
+    if monitor is not None:
+        monitor.start()
+
+    while has_residual(out_omega, omega, eps) and it < max_it:
+        if should_stop is not None and should_stop():
+            reason = STOPPED
+            break
         it += 1
         k = 0
 
@@ -70,51 +95,68 @@ def conjugate(omega: ndarray,
         delta = np.array(out_omega - omega)
         error = sum(map(lambda x: x ** 2, delta)) / 2
         errors.append(error)
+        if monitor is not None and monitor.update(error):
+            break
 
         # шаг 4.
-        alpha = find_alpha(theta, omega, error)
-        p = delta
-
         weight_deltas = np.outer(omega, delta)
         beta = (np.transpose(delta).dot(delta)) / (np.transpose(delta_prev).dot(delta_prev))
-        p = delta + beta * p
+        p = delta + beta * delta
+        if observer is not None:
+            observer.lap("delta")
 
         # шаг 5.
-        weight = np.copy(theta)
-        weight_deltas = alpha * (p + weight) + weight_deltas
-
-        for i in range(row_count):
-            for j in range(col_count):
-                if (i, j) in fixed:
-                    weight_deltas[i][j] = 0
+        # направление p действует на нефиксированные элементы, шаг вдоль него подбирается точно.
+        # Слагаемое alpha * theta исходного шага theta -= alpha * (p + theta) + outer отброшено, и это изменение
+        # метода: нормализация его не компенсирует. Строка (1 - alpha) * theta - alpha * p - outer после нормализации
+        # равна шагу (alpha * p + outer) / (1 - alpha), то есть шагу другой длины, а сдвиг отрицательных элементов
+        # выполняется до нормализации и зависит от масштаба. Без этого слагаемого find_alpha минимизирует ошибку
+        # вдоль того направления, которое действительно применяется.
+        weight_deltas[~free] = 0
+        direction = np.where(free, p, 0)
+        if observer is not None:
+            observer.lap("masking")
+        alpha = find_alpha(theta - weight_deltas, omega, -direction)
+        weight_deltas += alpha * direction
+        if observer is not None:
+            observer.lap("line_search")
 
         # шаг 6.
-        theta -= weight_deltas
+        apply_update(theta, weight_deltas, free)
+        if observer is not None:
+            observer.lap("update")
 
         # шаг 7.
-        if np.min(theta) < 0:
-            for i in range(row_count):
-                for j in range(col_count):
-                    if (i, j) not in fixed:
-                        theta[i][j] += (abs(np.min(theta)) * 2)
-
-        for i in range(row_count):
-            s = sum(theta[i])
-            for j in range(col_count):
-                theta[i][j] /= s
+        shift_negative(theta, free)
+        if observer is not None:
+            observer.lap("shift")
+        normalize_rows(theta)
+        if observer is not None:
+            observer.lap("normalization")
+            observer.iteration(it, error, delta, alpha)
+
+    reason = get_reason(not has_residual(out_omega, omega, eps), monitor, reason)
+    if return_reason:
+        return theta, out_omega, errors, it, reason
 
     return theta, out_omega, errors, it
 
 
-def find_alpha(theta, inp, p):
-    alpha, min_f = float("inf"), float("inf")
-    for a in np.arange(0, 1, 0.01):
-        w = np.copy(theta)
-        w += a * p
-        out = inp.dot(w)
-        f = sum([(o - i) ** 2 for o, i in zip(out, inp)]) / 2
-        if f < min_f:
-            min_f = f
-            alpha = a
-
-    return alpha
+def find_alpha(theta: ndarray, inp: ndarray, p: ndarray, residual: ndarray = None, slope: ndarray = None) -> float:
+    """
+    Точный поиск шага вдоль направления p.
+    Функция f(a) = |inp * (theta + a * p) - inp|^2 / 2 квадратична по a, поэтому её минимум при a >= 0
+    находится по двум скалярным произведениям без перебора и копирования матрицы.
+    Отрицательные шаги не рассматриваются.
+    Направление p может быть матрицей или вектором, который прибавляется к каждой строке theta.
+    Если заданы векторы residual и slope размерности inp (при матрице p), промежуточные значения
+    записываются в них и память не выделяется.
+    """
+    residual = np.dot(inp, theta, out=residual)
+    residual -= inp
+    slope = np.dot(inp, p, out=slope) if p.ndim == 2 else inp.sum() * p
+    curvature = slope.dot(slope)
+    if curvature == 0:
+        return 0.
+
+    return max(float(-residual.dot(slope) / curvature), 0.)
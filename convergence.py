@@ -0,0 +1,79 @@
+import math
+
+CONVERGED = "converged"
+STAGNATED = "stagnated"
+DIVERGED = "diverged"
+MAX_IT = "max_it"
+STOPPED = "stopped"
+INFEASIBLE = "infeasible"
+
+
+class ConvergenceMonitor:
+    """
+    Наблюдатель за историей ошибки метода формирования маршрутной матрицы (параметр monitor).
+    Прерывает метод досрочно, если ошибка перестала уменьшаться или начала расти, и хранит
+    причину завершения последнего решения в атрибуте reason:
+        converged - достигнута точность eps;
+        stagnated - за window итераций ошибка ни разу не опустилась ниже наименьшего значения более чем
+        в (1 - tolerance) раз: ошибка вышла на плато или колеблется, повторяя уже пройденные значения;
+        diverged - ошибка не является конечным числом или превысила наименьшее значение в divergence раз;
+        max_it - достигнуто максимальное число итераций;
+        stopped - метод остановлен извне (параметр should_stop);
+        infeasible - метод доказал, что задача не имеет решения (projection_solver.projection).
+    Память не зависит от числа итераций: хранятся только наименьшая ошибка и номер итерации, на которой она получена.
+
+    Parameters:
+        window: число итераций без заметного уменьшения ошибки, после которого метод прерывается
+        tolerance: относительное уменьшение наименьшей ошибки, которое считается заметным
+        divergence: во сколько раз ошибка должна превысить наименьшее значение, чтобы считаться расходящейся
+    """
+
+    def __init__(self, window: int = 200, tolerance: float = 10 ** (-3), divergence: float = 10 ** 6):
+        self.window = window
+        self.tolerance = tolerance
+        self.divergence = divergence
+        self.reason = None
+        self._best = math.inf
+        self._best_it = 0
+        self._it = 0
+
+    def start(self) -> None:
+        """Начало очередного решения."""
+        self.reason = None
+        self._best = math.inf
+        self._best_it = 0
+        self._it = 0
+
+    def update(self, error: float) -> bool:
+        """Учёт ошибки очередной итерации. Возвращает True, если метод следует прервать."""
+        self._it += 1
+        if not math.isfinite(error) or error > self._best * self.divergence:
+            self.reason = DIVERGED
+        elif error < self._best * (1 - self.tolerance):
+            self._best = error
+            self._best_it = self._it
+        elif self._it - self._best_it >= self.window:
+            self.reason = STAGNATED
+
+        return self.reason is not None
+
+    def finish(self, converged: bool, reason: str = None) -> str:
+        """
+        Завершение решения: если метод не был прерван наблюдателем, причиной считается reason (причина,
+        определённая самим методом), а при её отсутствии - converged или max_it по достигнутой точности.
+        """
+        if self.reason is None:
+            self.reason = reason or (CONVERGED if converged else MAX_IT)
+
+        return self.reason
+
+
+def get_reason(converged: bool, monitor: ConvergenceMonitor = None, reason: str = None) -> str:
+    """
+    Причина завершения метода: остановка самим методом (reason, например stopped), причина, определённая
+    наблюдателем monitor, или converged / max_it по достигнутой точности.
+    """
+    if monitor is not None:
+        return monitor.finish(converged, reason)
+
+    return reason or (CONVERGED if converged else MAX_IT)
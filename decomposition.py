@@ -0,0 +1,132 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+from scipy.sparse.csgraph import connected_components
+
+from feasibility import check_feasibility
+from gradient_descent import gradient_descent
+from theta_kernel import get_exact_omega, has_residual
+
+# пул процессов, общий для вызовов decomposed: создание пула и запуск процессов дороже решения небольших компонент
+_pool = None
+_pool_workers = None
+
+
+def get_blocks(w: ndarray) -> list[ndarray]:
+    """Разбиение узлов сети на компоненты сильной связности w (списки номеров узлов, по убыванию размера)."""
+    count, labels = connected_components(np.asarray(w) != 0, directed=True, connection="strong")
+    blocks = [np.flatnonzero(labels == label) for label in range(count)]
+    return sorted(blocks, key=len, reverse=True)
+
+
+def get_block_omega(omega: ndarray) -> ndarray:
+    """Часть вектора omega, нормированная так, чтобы её сумма в точности равнялась единице."""
+    return get_exact_omega(omega / sum(omega))
+
+
+def get_pool(workers: int = None) -> ProcessPoolExecutor:
+    """Общий пул из workers процессов (по умолчанию os.cpu_count()); пул пересоздаётся только при смене числа процессов."""
+    global _pool, _pool_workers
+    workers = workers or os.cpu_count()
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+
+    return _pool
+
+
+def decomposed(omega: ndarray,
+               w: ndarray,
+               get_initial_theta: Callable,
+               eps: float = 10 ** (-10),
+               log_step: int = 0,
+               max_it: int = 2_000,
+               method: Callable = gradient_descent,
+               workers: int = None,
+               executor: Executor = None) -> tuple[ndarray, ndarray, list[float], int]:
+    """
+    Формирование маршрутной матрицы по компонентам сильной связности топологии w.
+
+    Поток, покинувший компоненту сильной связности, не может в неё вернуться, поэтому при omega > 0
+    маршруты между компонентами в решении имеют нулевую вероятность, а маршрутная матрица блочно-диагональна.
+    Задача для каждой компоненты решается независимо (с частью вектора omega, нормированной к единице),
+    после чего блоки собираются в общую матрицу.
+
+    Алгоритм:
+        Шаг 1. Проверяем структурную разрешимость задачи и разбиваем узлы на компоненты сильной связности;
+        задача без решения или из одной компоненты решается методом method целиком (результат неразрешимой
+        задачи не сходится, как и при вызове method напрямую);
+        Шаг 2. Решаем задачи для компонент параллельно методом method;
+        Шаг 3. Собираем блоки в общую маршрутную матрицу, маршруты между компонентами обнуляются;
+        Шаг 4. Если из-за нормировки частей omega общая невязка превышает eps, уточняем собранную
+        матрицу методом method (маршруты между компонентами остаются нулевыми как фиксированные элементы).
+
+    Parameters:
+        omega, w, get_initial_theta, eps, log_step, max_it: совпадают с gradient_descent.gradient_descent
+        method: метод формирования маршрутной матрицы для отдельных компонент (gradient_descent или conjugate)
+        workers: число процессов, по умолчанию os.cpu_count(); при одном процессе компоненты решаются последовательно,
+        иначе - в пуле get_pool(workers), который создаётся один раз и используется повторно
+        executor: готовый пул (процессов или потоков), который используется вместо get_pool
+
+    Returns:
+        Полученная маршрутная матрица;
+        Соответствующий вектор интенсивностей потоков;
+        Массив значений ошибок всей сети: сумма ошибок компонент на каждой итерации и ошибки уточнения;
+        Число итераций: наибольшее по компонентам плюс число итераций уточнения.
+    """
+
+    assert sum(omega) == 1, "Сумма вектора omega должна равняться единицы."
+
+    # шаг 1.
+    blocks = get_blocks(w)
+    if len(blocks) == 1 or check_feasibility(omega, w, eps) is not None:
+        return method(omega, w, get_initial_theta, eps=eps, log_step=log_step, max_it=max_it)
+
+    # шаг 2.
+    tasks = [(get_block_omega(omega[block]), w[np.ix_(block, block)]) for block in blocks]
+    workers = workers or os.cpu_count()
+    if executor is None and workers == 1:
+        results = [method(block_omega, block_w, get_initial_theta, eps=eps, max_it=max_it)
+                   for block_omega, block_w in tasks]
+    else:
+        results = _solve_blocks(executor or get_pool(workers), tasks, method, get_initial_theta, eps, max_it)
+
+    # шаг 3.
+    theta = np.zeros(w.shape)
+    it = 0
+    errors = np.zeros(max(len(block_errors) for _, _, block_errors, _ in results))
+    for block, (block_theta, _, block_errors, block_it) in zip(blocks, results):
+        theta[np.ix_(block, block)] = block_theta
+        it = max(it, block_it)
+        # ошибка компоненты переводится в масштаб всей сети, завершившаяся компонента сохраняет последнее значение
+        if block_errors:
+            scale = sum(omega[block]) ** 2
+            errors[:len(block_errors)] += np.asarray(block_errors) * scale
+            errors[len(block_errors):] += block_errors[-1] * scale
+    errors = errors.tolist()
+    out_omega = omega.dot(theta)
+
+    # шаг 4.
+    if has_residual(out_omega, omega, eps) and it < max_it:
+        theta, out_omega, refine_errors, refine_it = method(omega, w, get_initial_theta, eps=eps, log_step=log_step,
+                                                            max_it=max_it - it, initial_theta=theta)
+        errors += refine_errors
+        it += refine_it
+
+    return theta, out_omega, errors, it
+
+
+def _solve_blocks(executor: Executor,
+                  tasks: list[tuple[ndarray, ndarray]],
+                  method: Callable,
+                  get_initial_theta: Callable,
+                  eps: float,
+                  max_it: int) -> list[tuple[ndarray, ndarray, list[float], int]]:
+    futures = [executor.submit(method, block_omega, block_w, get_initial_theta, eps=eps, max_it=max_it)
+               for block_omega, block_w in tasks]
+    return [future.result() for future in futures]
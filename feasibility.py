@@ -0,0 +1,57 @@
+import numpy as np
+from numpy import ndarray
+from scipy.sparse.csgraph import connected_components
+
+
+def check_feasibility(omega: ndarray, w: ndarray, eps: float = 10 ** (-10)) -> str | None:
+    """
+    Быстрая структурная проверка того, что для топологии w существует маршрутная матрица
+    с вектором omega (omega > 0). Проверяются необходимые условия:
+        1. В каждой строке w есть хотя бы один маршрут;
+        2. Поток, покидающий компоненту сильной связности, не может в неё вернуться, поэтому в решении
+        такие маршруты имеют нулевую вероятность. У каждого узла должен остаться маршрут внутри своей компоненты;
+        3. Поток в узел j не превосходит суммарной интенсивности узлов, из которых в него ведут
+        маршруты внутри компоненты: omega_j <= sum(omega_i).
+
+    Returns:
+        None, если нарушений не найдено, иначе описание причины, по которой решение невозможно.
+    """
+
+    w = np.asarray(w) != 0
+    if not w.any(axis=1).all():
+        return "есть узлы без исходящих маршрутов"
+
+    _, labels = connected_components(w, directed=True, connection="strong")
+    inner = w & (labels[:, None] == labels[None, :])
+    if not inner.any(axis=1).all():
+        return "есть узлы, все маршруты которых покидают компоненту сильной связности"
+
+    if np.any(omega.dot(inner) + eps < omega):
+        return "интенсивность входящего потока узла больше суммарной интенсивности его предшественников"
+
+    return None
+
+
+class PrescreenStats:
+    """Статистика предварительной проверки: сколько задач отброшено и сколько итераций методов сэкономлено."""
+
+    def __init__(self):
+        self.checked = 0
+        self.rejected = 0
+        self.saved_iterations = 0
+
+    def update(self, reason: str | None, max_it: int, solves: int = 1) -> None:
+        """Учёт результата проверки; отброшенная задача сэкономила бы solves запусков по max_it итераций."""
+        self.checked += 1
+        if reason is not None:
+            self.rejected += 1
+            self.saved_iterations += max_it * solves
+
+    def merge(self, other: "PrescreenStats") -> None:
+        self.checked += other.checked
+        self.rejected += other.rejected
+        self.saved_iterations += other.saved_iterations
+
+    def __str__(self):
+        return (f"Проверено задач: {self.checked}, отброшено: {self.rejected}, "
+                f"сэкономлено итераций: {self.saved_iterations}")
@@ -1,3 +1,18 @@
+import os
+
+import numpy as np
+
+RESULT_DTYPE = np.dtype([
+    ("it", "<i4"),
+    ("error", "<f8"),
+    ("n", "<i4"),
+    ("method", "S16"),
+    ("init", "S16"),
+    ("converged", "?"),
+    ("time", "<f8"),
+])
+
+
 def save_list_in_file(data, filename):
     data = map(str, data)
     with open(filename, "w") as file:
@@ -9,3 +24,53 @@ def load_list_from_file(filename, map_func):
         data = map(map_func, file.readline().split(","))
 
     return list(data)
+
+
+class ResultWriter:
+    """
+    Потоковая запись результатов решений в двоичный файл записей фиксированной длины.
+    Записи накапливаются в буфере и дописываются в конец файла пачками по batch_size,
+    поэтому стоимость записи не зависит от длины эксперимента.
+    """
+
+    def __init__(self, filename, batch_size=1024, dtype=RESULT_DTYPE):
+        self.filename = filename
+        self.buffer = np.zeros(batch_size, dtype=dtype)
+        self.size = 0
+        self.file = open(filename, "ab")
+
+    def append(self, **fields):
+        record = self.buffer[self.size]
+        for name, value in fields.items():
+            record[name] = value
+        self.size += 1
+        if self.size == len(self.buffer):
+            self.flush()
+
+    def extend(self, records):
+        self.flush()
+        np.asarray(records, dtype=self.buffer.dtype).tofile(self.file)
+
+    def flush(self):
+        self.buffer[:self.size].tofile(self.file)
+        self.file.flush()
+        self.buffer[:self.size] = 0
+        self.size = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load_results(filename, dtype=RESULT_DTYPE):
+    """Отображение файла результатов в память без разбора записей; поля доступны как results["it"]."""
+    if os.path.getsize(filename) == 0:
+        return np.zeros(0, dtype=dtype)
+
+    return np.memmap(filename, dtype=dtype, mode="r")
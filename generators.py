@@ -1,11 +1,15 @@
 import random
+from typing import Iterator
 
 import numpy as np
 from numpy import ndarray
 
+from checkpoint import Checkpoint, get_fingerprint
 from conjugate_gradient import conjugate
+from feasibility import PrescreenStats, check_feasibility
 from gradient_descent import gradient_descent
 from initial_theta import get_uniform_initial_theta
+from solver_cache import SolverCache
 
 
 def get_random_w(n: int) -> ndarray:
@@ -32,17 +36,88 @@ def get_omegas(min_systems: int, max_systems: int, count: int) -> list[ndarray]:
     return omegas
 
 
-def generate_good_omegas(min_count, max_count, count, max_iter=2_000):
-    good_omegas = []
-    omegas = get_omegas(min_count, max_count, count)
-    for omega in omegas:
-        for _ in range(20):
-            w = get_random_w(len(omega))
-            _, _, _, it1 = gradient_descent(omega, w, get_uniform_initial_theta, max_it=max_iter)
-            _, _, _, it2 = conjugate(omega, w, get_uniform_initial_theta, max_it=max_iter)
+def get_random_ws(n: int, count: int, rng: np.random.Generator = None) -> ndarray:
+    """
+    Пакетный аналог get_random_w: массив из count матриц смежности размерности (count, n, n).
+    Внедиагональные элементы равны 1 с вероятностью 1/2, затем в каждой строке случайный элемент
+    (возможно, диагональный) устанавливается в 1, так что у каждого узла есть хотя бы один маршрут.
+    """
+    rng = rng or np.random.default_rng()
+    ws = rng.integers(0, 2, (count, n, n)).astype(float)
+    ws[:, np.arange(n), np.arange(n)] = 0
+    ws[np.arange(count)[:, None], np.arange(n), rng.integers(0, n, (count, n))] = 1
+    return ws
 
-            if it1 != max_iter and it2 != max_iter and sum(omega) == 1:
-                good_omegas.append(omega)
-                break
 
+def get_random_omegas(n: int, count: int, rng: np.random.Generator = None) -> ndarray:
+    """
+    Пакетный аналог get_omegas для фиксированного числа систем: массив размерности (count, n).
+    Веса выбираются из [5, 10], нормируются и округляются до сотых, остаток прибавляется к случайной компоненте.
+    Векторы, сумма которых после округления не равна единице в точности, генерируются заново.
+    """
+    rng = rng or np.random.default_rng()
+    omegas = np.empty((count, n))
+    pending = np.arange(count)
+    while pending.size:
+        temp = rng.integers(5, 11, (pending.size, n))
+        omega = np.round(temp / temp.sum(axis=1, keepdims=True), 2)
+        index = rng.integers(0, n, pending.size)
+        omega[np.arange(pending.size), index] += 1 - np.cumsum(omega, axis=1)[:, -1]
+        omegas[pending] = omega
+        # сумма накапливается последовательно, как во встроенной sum, которой проверяют omega методы
+        pending = pending[np.cumsum(omega, axis=1)[:, -1] != 1]
+
+    return omegas
+
+
+def generate_problems(n: int,
+                      batch_size: int,
+                      rng: np.random.Generator = None,
+                      batches: int = None) -> Iterator[tuple[ndarray, ndarray]]:
+    """Поток пакетов задач (omegas, ws) размерности n; при batches=None поток не ограничен."""
+    rng = rng or np.random.default_rng()
+    produced = 0
+    while batches is None or produced < batches:
+        yield get_random_omegas(n, batch_size, rng), get_random_ws(n, batch_size, rng)
+        produced += 1
+
+
+def generate_good_omegas(min_count, max_count, count, max_iter=2_000, cache: SolverCache = None,
+                         stats: PrescreenStats = None, checkpoint: str = None):
+    gradient_method, conjugate_method = gradient_descent, conjugate
+    if cache is not None:
+        gradient_method, conjugate_method = cache.wrap(gradient_descent), cache.wrap(conjugate)
+
+    # при заданном файле checkpoint прерванный запуск продолжается с последнего обработанного вектора omega
+    fingerprint = get_fingerprint("generate_good_omegas", min_count, max_count, count, max_iter)
+    with Checkpoint(checkpoint, fingerprint) as saver:
+        state = saver.restore({"done": 0, "omegas": None, "good_omegas": [], "stats": PrescreenStats()})
+        if state["omegas"] is None:
+            state["omegas"] = get_omegas(min_count, max_count, count)
+        good_omegas = state["good_omegas"]
+
+        for index in range(state["done"], len(state["omegas"])):
+            omega = state["omegas"][index]
+            if sum(omega) == 1:
+                for _ in range(20):
+                    w = get_random_w(len(omega))
+                    reason = check_feasibility(omega, w)
+                    state["stats"].update(reason, max_iter, solves=2)
+                    if reason is not None:
+                        continue
+
+                    _, _, _, it1 = gradient_method(omega, w, get_uniform_initial_theta, max_it=max_iter)
+                    _, _, _, it2 = conjugate_method(omega, w, get_uniform_initial_theta, max_it=max_iter)
+
+                    if it1 != max_iter and it2 != max_iter:
+                        good_omegas.append(omega)
+                        break
+
+            state["done"] = index + 1
+            saver.update(state)
+
+        saver.clear()
+
+    if stats is not None:
+        stats.merge(state["stats"])
     return good_omegas
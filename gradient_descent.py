@@ -3,13 +3,24 @@ from typing import Callable
 import numpy as np
 from numpy import ndarray
 
+from convergence import STOPPED, ConvergenceMonitor, get_reason
+from profiling import SolverProfile
+from theta_kernel import apply_update, get_free_mask, has_residual, normalize_rows, shift_negative
+
 
 def gradient_descent(omega: ndarray,
                      w: ndarray,
                      get_initial_theta: Callable,
                      eps: float = 10 ** (-10),
                      log_step: int = 0,
-                     max_it: int = 2_000) -> tuple[ndarray, ndarray, list[float], int]:
+                     max_it: int = 2_000,
+                     initial_theta: ndarray = None,
+                     free: ndarray = None,
+                     observer: SolverProfile = None,
+                     optimizer=None,
+                     monitor: ConvergenceMonitor = None,
+                     should_stop: Callable[[], bool] = None,
+                     return_reason: bool = False) -> tuple:
     """
     Функция, реализующая метод формирования маршрутной матрицы СеМо
     с заданным вектором относительных интенсивностей потоков
@@ -32,69 +43,91 @@ def gradient_descent(omega: ndarray,
         log_step: параметр, отвечающая за шаг логирование в процессе работы метода,
         если параметр равен 0 - логирование не производится, по умолчанию имеет значение 0
         max_it: максимальное число итераций, если решение не будет найдено, будет выведена приближенная матрица
+        initial_theta: начальная маршрутная матрица (например, решение для предыдущего вектора omega),
+        если задана, get_initial_theta не используется; сама матрица не изменяется
+        free: маска нефиксированных элементов, по умолчанию определяется по начальной маршрутной матрице
+        observer: наблюдатель (profiling.SolverProfile), получающий метрики итераций и время по фазам;
+        если не задан, измерения не производятся
+        optimizer: стратегия шага из optimizers.py (FixedStep, Nesterov, RMSProp, Adam, BarzilaiBorwein),
+        получающая градиент по нефиксированным элементам; по умолчанию используется исходное правило с шагом 1
+        monitor: наблюдатель за историей ошибки (convergence.ConvergenceMonitor), прерывающий метод при застое
+        или расхождении; причина завершения сохраняется в monitor.reason (и возвращается при return_reason=True)
+        should_stop: функция без аргументов, опрашиваемая в начале каждой итерации; если она вернула True,
+        метод завершается с текущей матрицей (например, для отмены из другого потока)
+        return_reason: если True, в результат добавляется причина завершения (константы convergence.py)
 
     Returns:
         Полученная маршрутная матрица;
         Соответствующий вектор интенсивностей потоков;
         Массив, содержащий значения ошибок в процессе формирования матрицы;
-        Число пройденных итераций.
+        Число пройденных итераций;
+        При return_reason=True - причина завершения: converged, max_it, stopped или причина, определённая monitor.
 
     """
 
     assert sum(omega) == 1, "Сумма вектора omega должна равняться единицы."
 
     # шаг 1.
-    theta = get_initial_theta(w, omega)
+    theta = get_initial_theta(w, omega) if initial_theta is None else np.array(initial_theta, dtype=float)
     # print("Омега: ", omega)
     # print("Начальная маршрутная матрица theta имеет следующий вид:\n", theta, "\n")
 
-    row_count, col_count = theta.shape[0], theta.shape[1]
-
     # шаг 2.
-    fixed = set()
-    for i in range(row_count):
-        for j in range(col_count):
-            # нулевые и единичные элементы фиксированы
-            if theta[i][j] == 0 or theta[i][j] == 1:
-                fixed |= {(i, j)}
+    if free is None:
+        free = get_free_mask(theta)
 
     it = 0
     errors = []
+    reason = None
     out_omega = omega.dot(theta)
-
-    while any(list(abs(x) > eps for x in out_omega - omega)) and it < max_it:
+    if observer is not None:
+        observer.start()
+    if monitor is not None:
+        monitor.start()
+    if optimizer is not None:
+        optimizer.reset()
+
+    while has_residual(out_omega, omega, eps) and it < max_it:
+        if should_stop is not None and should_stop():
+            reason = STOPPED
+            break
         it += 1
 
         # шаг 3.
         out_omega = omega.dot(theta)
         delta = np.array(out_omega - omega)
-        error = sum([float(d) ** 2 for d in delta]) / 2
+        error = float(delta.dot(delta)) / 2
         errors.append(error)
+        if monitor is not None and monitor.update(error):
+            break
         weight_deltas = np.outer(omega, delta)
-
-        for i in range(row_count):
-            for j in range(col_count):
-                if (i, j) in fixed:
-                    weight_deltas[i][j] = 0
+        if optimizer is not None:
+            weight_deltas[~free] = 0
+            weight_deltas = optimizer.step(weight_deltas, theta)
+        if observer is not None:
+            observer.lap("delta")
 
         # шаг 4.
-        theta -= weight_deltas
+        apply_update(theta, weight_deltas, free)
+        if observer is not None:
+            observer.lap("update")
 
         # шаг 5.
-        if np.min(theta) < 0:
-            for i in range(row_count):
-                for j in range(col_count):
-                    if (i, j) not in fixed:
-                        theta[i][j] += (abs(np.min(theta)) * 2)
-
-        for i in range(row_count):
-            s = sum(theta[i])
-            for j in range(col_count):
-                theta[i][j] /= s
+        shift_negative(theta, free)
+        if observer is not None:
+            observer.lap("shift")
+        normalize_rows(theta)
+        if observer is not None:
+            observer.lap("normalization")
+            observer.iteration(it, error, delta, 1.)
 
         if log_step and it % log_step == 0:
             print(f"Итерация {it}:")
             print("Полученная омега:", out_omega)
             print("Theta\n", theta, "\n")
 
+    reason = get_reason(not has_residual(out_omega, omega, eps), monitor, reason)
+    if return_reason:
+        return theta, out_omega, errors, it, reason
+
     return theta, out_omega, errors, it
@@ -33,3 +33,16 @@ def get_smart_initial_theta(w: ndarray, omega: ndarray) -> ndarray:
             theta[i][j] /= s
 
     return theta
+
+
+def get_random_initial_theta(w: ndarray, omega: ndarray, seed: int = None, scale: float = 0.5) -> ndarray:
+    """Равномерная начальная матрица со случайным (логнормальным) возмущением ненулевых элементов."""
+    rng = np.random.default_rng(seed)
+    theta = np.where(w == 1, rng.lognormal(0, scale, w.shape), 0)
+    return theta / theta.sum(axis=1, keepdims=True)
+
+
+# реестр начальных маршрутных матриц: имя (аргументы командной строки, ключи результатов) -> функция
+INITS = {"uniform": get_uniform_initial_theta, "smart": get_smart_initial_theta, "random": get_random_initial_theta}
+# начальные матрицы, не зависящие от случайного зерна: воспроизводимые эксперименты и замеры
+DETERMINISTIC_INITS = ("uniform", "smart")
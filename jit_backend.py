@@ -0,0 +1,253 @@
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+from conjugate_gradient import conjugate
+from gradient_descent import gradient_descent
+from theta_kernel import get_free_mask
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# при отсутствии numba ядра остаются обычными функциями Python (для проверки), а методы используют NumPy
+NUMBA_AVAILABLE = njit is not None
+
+
+def _jit(function):
+    return njit(cache=True)(function) if NUMBA_AVAILABLE else function
+
+
+@_jit
+def _product(omega, theta, out):
+    n = theta.shape[0]
+    for j in range(n):
+        s = 0.
+        for i in range(n):
+            s += omega[i] * theta[i, j]
+        out[j] = s
+
+
+@_jit
+def _has_residual(out_omega, omega, eps):
+    for j in range(omega.shape[0]):
+        if abs(out_omega[j] - omega[j]) > eps:
+            return True
+    return False
+
+
+@_jit
+def _apply_update(theta, weight_deltas, free):
+    n = theta.shape[0]
+    for i in range(n):
+        for j in range(n):
+            if free[i, j]:
+                theta[i, j] -= weight_deltas[i, j]
+
+
+@_jit
+def _shift_negative(theta, free, suffix):
+    # то же правило, что и theta_kernel.shift_negative: к каждому нефиксированному элементу (построчно)
+    # прибавляется удвоенный модуль текущего минимума всей матрицы
+    n = theta.shape[0]
+    running = np.inf
+    minimum = np.inf
+    for i in range(n):
+        for j in range(n):
+            minimum = min(minimum, theta[i, j])
+            if not free[i, j]:
+                running = min(running, theta[i, j])
+    if minimum >= 0:
+        return
+
+    current = np.inf
+    for k in range(n * n - 1, -1, -1):
+        if free[k // n, k % n]:
+            current = min(current, theta[k // n, k % n])
+        suffix[k] = current
+
+    for k in range(n * n):
+        i, j = k // n, k % n
+        if free[i, j]:
+            theta[i, j] += abs(min(suffix[k], running)) * 2
+            running = min(running, theta[i, j])
+
+
+@_jit
+def _normalize_rows(theta):
+    n = theta.shape[0]
+    for i in range(n):
+        s = 0.
+        for j in range(n):
+            s += theta[i, j]
+        for j in range(n):
+            theta[i, j] /= s
+
+
+@_jit
+def _gradient_loop(omega, theta, free, eps, max_it, errors):
+    n = theta.shape[0]
+    out_omega = np.empty(n)
+    delta = np.empty(n)
+    weight_deltas = np.empty((n, n))
+    suffix = np.empty(n * n)
+
+    it = 0
+    _product(omega, theta, out_omega)
+    while _has_residual(out_omega, omega, eps) and it < max_it:
+        _product(omega, theta, out_omega)
+        error = 0.
+        for j in range(n):
+            delta[j] = out_omega[j] - omega[j]
+            error += delta[j] * delta[j]
+        errors[it] = error / 2
+        it += 1
+
+        for i in range(n):
+            for j in range(n):
+                weight_deltas[i, j] = omega[i] * delta[j]
+        _apply_update(theta, weight_deltas, free)
+        _shift_negative(theta, free, suffix)
+        _normalize_rows(theta)
+
+    return it, out_omega
+
+
+@_jit
+def _conjugate_loop(omega, theta, free, eps, max_it, errors):
+    n = theta.shape[0]
+    out_omega = np.empty(n)
+    delta = np.empty(n)
+    delta_prev = np.empty(n)
+    p = np.empty(n)
+    slope = np.empty(n)
+    residual = np.empty(n)
+    weight_deltas = np.empty((n, n))
+    suffix = np.empty(n * n)
+
+    it = 0
+    _product(omega, theta, out_omega)
+    while _has_residual(out_omega, omega, eps) and it < max_it:
+        # шаг 3.
+        error = 0.
+        prev_norm = 0.
+        for j in range(n):
+            delta_prev[j] = out_omega[j] - omega[j]
+            prev_norm += delta_prev[j] * delta_prev[j]
+        _product(omega, theta, out_omega)
+        norm = 0.
+        for j in range(n):
+            delta[j] = out_omega[j] - omega[j]
+            error += delta[j] ** 2
+            norm += delta[j] * delta[j]
+        errors[it] = error / 2
+        it += 1
+
+        # шаг 4.
+        beta = norm / prev_norm
+        for j in range(n):
+            p[j] = delta[j] + beta * delta[j]
+
+        # шаг 5. точный поиск шага вдоль направления p по нефиксированным элементам (как conjugate_gradient.find_alpha)
+        for i in range(n):
+            for j in range(n):
+                weight_deltas[i, j] = omega[i] * delta[j] if free[i, j] else 0.
+        for j in range(n):
+            r = 0.
+            s = 0.
+            for i in range(n):
+                r += omega[i] * (theta[i, j] - weight_deltas[i, j])
+                if free[i, j]:
+                    s -= omega[i] * p[j]
+            residual[j] = r - omega[j]
+            slope[j] = s
+        curvature = 0.
+        projection = 0.
+        for j in range(n):
+            curvature += slope[j] * slope[j]
+            projection += residual[j] * slope[j]
+        alpha = max(-projection / curvature, 0.) if curvature != 0 else 0.
+        for i in range(n):
+            for j in range(n):
+                if free[i, j]:
+                    weight_deltas[i, j] += alpha * p[j]
+
+        # шаги 6 и 7.
+        _apply_update(theta, weight_deltas, free)
+        _shift_negative(theta, free, suffix)
+        _normalize_rows(theta)
+
+    return it, out_omega
+
+
+LOOPS = {"gradient": _gradient_loop, "conjugate": _conjugate_loop}
+
+
+def solve_with_kernel(method: str,
+                      omega: ndarray,
+                      w: ndarray,
+                      get_initial_theta: Callable,
+                      eps: float = 10 ** (-10),
+                      max_it: int = 2_000,
+                      initial_theta: ndarray = None,
+                      free: ndarray = None) -> tuple[ndarray, ndarray, list[float], int]:
+    """
+    Решение задачи циклом итераций, скомпилированным numba в одну функцию (method - "gradient" или "conjugate").
+    Если numba не установлена, выполняется тот же цикл на Python (медленно; используется для проверки ядер).
+    Параметры и результат совпадают с gradient_descent.gradient_descent.
+    """
+    assert sum(omega) == 1, "Сумма вектора omega должна равняться единицы."
+
+    theta = get_initial_theta(w, omega) if initial_theta is None else np.array(initial_theta, dtype=float)
+    theta = np.ascontiguousarray(theta, dtype=float)
+    if free is None:
+        free = get_free_mask(theta)
+    errors = np.empty(max_it)
+    it, out_omega = LOOPS[method](np.ascontiguousarray(omega, dtype=float), theta, np.ascontiguousarray(free),
+                                  float(eps), max_it, errors)
+
+    return theta, out_omega, errors[:it].tolist(), it
+
+
+def jit_gradient_descent(omega: ndarray,
+                         w: ndarray,
+                         get_initial_theta: Callable,
+                         eps: float = 10 ** (-10),
+                         log_step: int = 0,
+                         max_it: int = 2_000,
+                         initial_theta: ndarray = None,
+                         free: ndarray = None,
+                         **kwargs) -> tuple[ndarray, ndarray, list[float], int]:
+    """
+    Метод градиентного спуска со скомпилированным циклом итераций. Если numba недоступна или заданы
+    параметры, которые ядро не поддерживает (log_step, observer, optimizer, monitor, should_stop, return_reason),
+    используется
+    gradient_descent.gradient_descent.
+    """
+    if not NUMBA_AVAILABLE or log_step or any(value is not None and value is not False
+                                              for value in kwargs.values()):
+        return gradient_descent(omega, w, get_initial_theta, eps, log_step, max_it, initial_theta, free, **kwargs)
+
+    return solve_with_kernel("gradient", omega, w, get_initial_theta, eps, max_it, initial_theta, free)
+
+
+def jit_conjugate(omega: ndarray,
+                  w: ndarray,
+                  get_initial_theta: Callable,
+                  eps: float = 10 ** (-10),
+                  log_step: int = 0,
+                  max_it: int = 2_000,
+                  initial_theta: ndarray = None,
+                  free: ndarray = None,
+                  **kwargs) -> tuple[ndarray, ndarray, list[float], int]:
+    """
+    Метод сопряженных градиентов со скомпилированным циклом итераций.
+    Условия перехода на conjugate_gradient.conjugate - как в jit_gradient_descent.
+    """
+    if not NUMBA_AVAILABLE or log_step or any(value is not None and value is not False
+                                              for value in kwargs.values()):
+        return conjugate(omega, w, get_initial_theta, eps, log_step, max_it, initial_theta, free, **kwargs)
+
+    return solve_with_kernel("conjugate", omega, w, get_initial_theta, eps, max_it, initial_theta, free)
@@ -1,9 +1,16 @@
 import time
+from collections import Counter
 
-from file_utils import save_list_in_file
+from checkpoint import Checkpoint, get_fingerprint
+from convergence import CONVERGED, ConvergenceMonitor
+from feasibility import PrescreenStats, check_feasibility
+from file_utils import ResultWriter, save_list_in_file
 from generators import *
 from gradient_descent import gradient_descent
 from initial_theta import *
+from profiling import SolverProfile
+from streaming_stats import StreamingStats
+from runner import run_general
 
 
 def simple_case_1():
@@ -61,30 +68,37 @@ def simple_case_2():
     print(theta2)
 
 
-def case_1():
+def case_1(checkpoint: str = "data/case_1.ckpt"):
     max_it = 10_000
     max_step = 1000
     inp_omega = np.array([.35, .27, .15, .23])
 
-    difference = []
-    its = []
-    opt_its = []
-    for step in range(max_step):
-        w = get_random_w(len(inp_omega))
-        _, _, _, it = gradient_descent(inp_omega, w, get_uniform_initial_theta, max_it=max_it)
-        _, _, _, opt_it = gradient_descent(inp_omega, w, get_smart_initial_theta, max_it=max_it)
+    # прерванный запуск продолжается с контрольной точки, решённые задачи повторно не решаются
+    with Checkpoint(checkpoint, get_fingerprint("case_1", inp_omega, max_step, max_it)) as saver:
+        state = saver.restore({"step": 0, "its": [], "opt_its": [], "difference": [],
+                               "results": StreamingStats(max_it)})
+        its, opt_its, difference, results = state["its"], state["opt_its"], state["difference"], state["results"]
+        for step in range(state["step"], max_step):
+            w = get_random_w(len(inp_omega))
+            _, _, _, it = results.solve(gradient_descent, inp_omega, w, get_uniform_initial_theta, max_it=max_it)
+            _, _, _, opt_it = results.solve(gradient_descent, inp_omega, w, get_smart_initial_theta, max_it=max_it)
+
+            if it != max_it or opt_it != max_it:
+                its.append(it)
+                opt_its.append(opt_it)
+                if it - opt_it > 0:
+                    difference.append(it - opt_it)
+
+            state["step"] = step + 1
+            saver.update(state)
+            print(f"{step}/{max_step}")
+            if (step + 1) % 100 == 0:
+                print(results.summary())
 
-        if it != max_it or opt_it != max_it:
-            its.append(it)
-            opt_its.append(opt_it)
-            if it - opt_it > 0:
-                difference.append(it - opt_it)
-
-        print(f"{step}/{max_step}")
-
-    save_list_in_file(its, "data/its.txt")
-    save_list_in_file(opt_its, "data/opt_its.txt")
-    save_list_in_file(difference, "data/diff.txt")
+        save_list_in_file(its, "data/its.txt")
+        save_list_in_file(opt_its, "data/opt_its.txt")
+        save_list_in_file(difference, "data/diff.txt")
+        saver.clear()
 
 
 def case_2():
@@ -183,52 +197,81 @@ def case_5():
 
     its = []
     opt_its = []
-    for step in range(max_step):
-        w = get_random_w(len(inp_omega))
-        _, _, _, it = conjugate(inp_omega, w, get_uniform_initial_theta, max_it=max_it)
-        _, _, _, opt_it = conjugate(inp_omega, w, get_smart_initial_theta, max_it=max_it)
-
-        if it != max_it or opt_it != max_it:
-            its.append(it)
-            opt_its.append(opt_it)
+    with ResultWriter("data/conjugate/results.bin", batch_size=64) as writer:
+        for step in range(max_step):
+            w = get_random_w(len(inp_omega))
+            start = time.perf_counter()
+            _, _, errors, it = conjugate(inp_omega, w, get_uniform_initial_theta, max_it=max_it)
+            writer.append(it=it, error=errors[-1] if errors else 0, n=len(inp_omega), method="conjugate",
+                          init="uniform", converged=it != max_it, time=time.perf_counter() - start)
+            start = time.perf_counter()
+            _, _, errors, opt_it = conjugate(inp_omega, w, get_smart_initial_theta, max_it=max_it)
+            writer.append(it=opt_it, error=errors[-1] if errors else 0, n=len(inp_omega), method="conjugate",
+                          init="smart", converged=opt_it != max_it, time=time.perf_counter() - start)
+
+            if it != max_it or opt_it != max_it:
+                its.append(it)
+                opt_its.append(opt_it)
+
+            print("\r" + f"{step + 1}/{max_step}", end="")
 
-        save_list_in_file(its, "data/its.txt")
-        save_list_in_file(opt_its, "data/opt_its.txt")
-
-        print("\r" + f"{step + 1}/{count}", end="")
+    save_list_in_file(its, "data/its.txt")
+    save_list_in_file(opt_its, "data/opt_its.txt")
 
 
-def general(omegas, count):
+def general(omegas, count, profile: SolverProfile = None, checkpoint: str = "data/general.ckpt"):
     max_iter = 2_000
-    gradient_its = []
-    gradient_opt_its = []
-    conjugate_its = []
-    conjugate_opt_its = []
-
-    for index, omega in enumerate(omegas):
-        print(f"{index + 1}/{len(omegas)}", omega)
-        for step in range(count):
-            w = get_random_w(len(omega))
-            _, _, _, it = gradient_descent(omega, w, get_uniform_initial_theta)
-            _, _, _, opt_it = gradient_descent(omega, w, get_smart_initial_theta)
-            if it != max_iter and opt_it != max_iter:
-                gradient_its.append(it)
-                gradient_opt_its.append(opt_it)
-
-            _, _, _, it = conjugate(omega, w, get_uniform_initial_theta)
-            _, _, _, opt_it = conjugate(omega, w, get_smart_initial_theta)
-            if it != max_iter and opt_it != max_iter:
-                conjugate_its.append(it)
-                conjugate_opt_its.append(opt_it)
-
-            print("\r" + f"\t{step + 1}/{count}", end="")
-        print()
+    monitor = ConvergenceMonitor()
+
+    # прерванный запуск продолжается с контрольной точки, решённые задачи повторно не решаются
+    with Checkpoint(checkpoint, get_fingerprint("general", list(omegas), count, max_iter)) as saver:
+        state = saver.restore({"done": 0, "gradient_its": [], "gradient_opt_its": [], "conjugate_its": [],
+                               "conjugate_opt_its": [], "stats": PrescreenStats(), "reasons": Counter(),
+                               "results": StreamingStats(max_iter)})
+        gradient_its, gradient_opt_its = state["gradient_its"], state["gradient_opt_its"]
+        conjugate_its, conjugate_opt_its = state["conjugate_its"], state["conjugate_opt_its"]
+        stats, reasons, results = state["stats"], state["reasons"], state["results"]
+
+        for index, omega in enumerate(omegas):
+            print(f"{index + 1}/{len(omegas)}", omega)
+            for step in range(count):
+                if index * count + step < state["done"]:
+                    continue
+
+                w = get_random_w(len(omega))
+                reason = check_feasibility(omega, w)
+                stats.update(reason, max_iter, solves=4)
+                if reason is None:
+                    # метод прерывается досрочно при застое или расхождении ошибки, reason - причина завершения
+                    for method, method_its, method_opt_its in ((gradient_descent, gradient_its, gradient_opt_its),
+                                                               (conjugate, conjugate_its, conjugate_opt_its)):
+                        _, _, _, it, it_reason = results.solve(method, omega, w, get_uniform_initial_theta,
+                                                               observer=profile, monitor=monitor, return_reason=True)
+                        _, _, _, opt_it, opt_reason = results.solve(method, omega, w, get_smart_initial_theta,
+                                                                    observer=profile, monitor=monitor,
+                                                                    return_reason=True)
+                        reasons.update((it_reason, opt_reason))
+                        if it_reason == CONVERGED and opt_reason == CONVERGED:
+                            method_its.append(it)
+                            method_opt_its.append(opt_it)
+
+                state["done"] = index * count + step + 1
+                saver.update(state)
+                print("\r" + f"\t{step + 1}/{count}", end="")
+            print()
+            # промежуточная сводка после каждого вектора omega
+            print(results.summary())
+        print(stats)
+        print(", ".join(f"{reason}: {count}" for reason, count in reasons.most_common()))
+        if profile is not None:
+            print(profile.report())
 
-    save_list_in_file(gradient_its, f"data/gradient/its.txt")
-    save_list_in_file(gradient_opt_its, f"data/gradient/opt_its.txt")
+        save_list_in_file(gradient_its, f"data/gradient/its.txt")
+        save_list_in_file(gradient_opt_its, f"data/gradient/opt_its.txt")
 
-    save_list_in_file(conjugate_its, f"data/conjugate/its.txt")
-    save_list_in_file(conjugate_opt_its, f"data/conjugate/opt_its.txt")
+        save_list_in_file(conjugate_its, f"data/conjugate/its.txt")
+        save_list_in_file(conjugate_opt_its, f"data/conjugate/opt_its.txt")
+        saver.clear()
 
 
 if __name__ == '__main__':
@@ -246,3 +289,4 @@ if __name__ == '__main__':
         np.array([0.3, 0.22, 0.22, 0.26]),
     ]
     # general(omegas, count)
+    # run_general(omegas, count)  # параллельный вариант general из runner.py
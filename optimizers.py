@@ -0,0 +1,115 @@
+import numpy as np
+from numpy import ndarray
+
+
+class FixedStep:
+    """Шаг с постоянным коэффициентом скорости обучения; lr=1 соответствует исходному правилу метода."""
+
+    def __init__(self, lr: float = 1.):
+        self.lr = lr
+
+    def reset(self) -> None:
+        pass
+
+    def step(self, gradient: ndarray, theta: ndarray) -> ndarray:
+        return self.lr * gradient
+
+
+class Nesterov:
+    """Шаг с моментом Нестерова: v = momentum * v + g, изменение lr * (g + momentum * v)."""
+
+    def __init__(self, lr: float = 1., momentum: float = 0.5):
+        self.lr = lr
+        self.momentum = momentum
+        self.velocity = None
+
+    def reset(self) -> None:
+        self.velocity = None
+
+    def step(self, gradient: ndarray, theta: ndarray) -> ndarray:
+        if self.velocity is None:
+            self.velocity = np.zeros_like(gradient)
+        self.velocity *= self.momentum
+        self.velocity += gradient
+        return self.lr * (gradient + self.momentum * self.velocity)
+
+
+class RMSProp:
+    """Адаптивный шаг: градиент делится на корень скользящего среднего своих квадратов."""
+
+    def __init__(self, lr: float = 0.01, decay: float = 0.999, eps: float = 10 ** (-12)):
+        self.lr = lr
+        self.decay = decay
+        self.eps = eps
+        self.square = None
+
+    def reset(self) -> None:
+        self.square = None
+
+    def step(self, gradient: ndarray, theta: ndarray) -> ndarray:
+        if self.square is None:
+            self.square = np.zeros_like(gradient)
+        self.square *= self.decay
+        self.square += (1 - self.decay) * gradient ** 2
+        return self.lr * gradient / (np.sqrt(self.square) + self.eps)
+
+
+class Adam:
+    """Адаптивный шаг Adam со скользящими средними градиента и его квадрата и поправкой смещения."""
+
+    def __init__(self, lr: float = 0.05, beta1: float = 0.9, beta2: float = 0.999, eps: float = 10 ** (-12)):
+        self.lr = lr
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.mean = None
+        self.square = None
+        self.t = 0
+
+    def reset(self) -> None:
+        self.mean = None
+        self.square = None
+        self.t = 0
+
+    def step(self, gradient: ndarray, theta: ndarray) -> ndarray:
+        if self.mean is None:
+            self.mean, self.square = np.zeros_like(gradient), np.zeros_like(gradient)
+        self.t += 1
+        self.mean *= self.beta1
+        self.mean += (1 - self.beta1) * gradient
+        self.square *= self.beta2
+        self.square += (1 - self.beta2) * gradient ** 2
+        mean = self.mean / (1 - self.beta1 ** self.t)
+        square = self.square / (1 - self.beta2 ** self.t)
+        return self.lr * mean / (np.sqrt(square) + self.eps)
+
+
+class BarzilaiBorwein:
+    """
+    Шаг Барзилая - Борвейна: коэффициент (s, s) / (s, y), где s - изменение маршрутной матрицы
+    (после сдвига и нормализации), y - изменение градиента за итерацию. На первой итерации и при
+    неположительной кривизне используется lr; коэффициент ограничен сверху max_lr.
+    """
+
+    def __init__(self, lr: float = 1., max_lr: float = 10 ** 4):
+        self.lr = lr
+        self.max_lr = max_lr
+        self.theta = None
+        self.gradient = None
+
+    def reset(self) -> None:
+        self.theta = None
+        self.gradient = None
+
+    def step(self, gradient: ndarray, theta: ndarray) -> ndarray:
+        lr = self.lr
+        if self.theta is not None:
+            s = theta - self.theta
+            y = gradient - self.gradient
+            curvature = np.vdot(s, y)
+            if curvature > 0:
+                lr = min(np.vdot(s, s) / curvature, self.max_lr)
+
+        self.theta = np.copy(theta)
+        self.gradient = np.copy(gradient)
+        return lr * gradient
@@ -0,0 +1,103 @@
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+PHASES = ("delta", "line_search", "masking", "update", "shift", "normalization")
+
+
+class SolverProfile:
+    """
+    Наблюдатель за работой методов формирования маршрутной матрицы (параметр observer).
+    Накапливает время по фазам итерации, число итераций и решений, а при trace_allocations=True -
+    объём памяти, выделяемой в каждой фазе (по данным tracemalloc). Если задан callback, он вызывается
+    после каждой итерации с номером итерации и словарём метрик: error, max_residual, step.
+    Профили разных запусков (в том числе из разных процессов) объединяются методом merge.
+    Если трассировку tracemalloc запустил профиль, она останавливается методом stop или при выходе
+    из блока with: with SolverProfile(trace_allocations=True) as profile: ...
+
+    Parameters:
+        callback: функция callback(it, metrics), вызываемая после каждой итерации
+        trace_allocations: учитывать выделение памяти по фазам (заметно замедляет вычисления)
+    """
+
+    def __init__(self, callback: Callable = None, trace_allocations: bool = False):
+        self.callback = callback
+        self.trace_allocations = trace_allocations
+        self.timings = dict.fromkeys(PHASES, 0.)
+        self.allocations = dict.fromkeys(PHASES, 0)
+        self.iterations = 0
+        self.solves = 0
+        self._last = 0.
+        self._memory = 0
+        self._tracing = False
+
+    def __enter__(self) -> "SolverProfile":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """Начало очередного решения."""
+        self.solves += 1
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self._reset()
+
+    def stop(self) -> None:
+        """Завершение профилирования: остановка трассировки tracemalloc, если её запустил этот профиль."""
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def lap(self, phase: str) -> None:
+        """Завершение фазы итерации: время с предыдущей отметки относится к phase."""
+        now = time.perf_counter()
+        self.timings[phase] += now - self._last
+        if self.trace_allocations:
+            _, peak = tracemalloc.get_traced_memory()
+            self.allocations[phase] += peak - self._memory
+        self._reset()
+
+    def iteration(self, it: int, error: float, delta: ndarray, step: float) -> None:
+        """Завершение итерации."""
+        self.iterations += 1
+        if self.callback is not None:
+            self.callback(it, {"error": error, "max_residual": float(np.abs(delta).max()), "step": step})
+        self._reset()
+
+    def merge(self, other: "SolverProfile") -> None:
+        for phase in PHASES:
+            self.timings[phase] += other.timings[phase]
+            self.allocations[phase] += other.allocations[phase]
+        self.iterations += other.iterations
+        self.solves += other.solves
+
+    def report(self) -> str:
+        total = sum(self.timings.values())
+        lines = [f"Решений: {self.solves}, итераций: {self.iterations}, время итераций: {total:.3f} с"]
+        for phase in PHASES:
+            if not self.timings[phase]:
+                continue
+            line = (f"\t{phase:<14} {self.timings[phase]:10.4f} с {self.timings[phase] / total:7.1%} "
+                    f"{self.timings[phase] / max(self.iterations, 1) * 1e6:10.2f} мкс/итерация")
+            if self.trace_allocations:
+                line += f" {self.allocations[phase] / max(self.iterations, 1):12.0f} байт/итерация"
+            lines.append(line)
+
+        return "\n".join(lines)
+
+    def __getstate__(self):
+        # функция обратного вызова может быть не сериализуемой, в другой процесс передаются только счётчики
+        # трассировка памяти принадлежит исходному процессу
+        return {**self.__dict__, "callback": None, "_tracing": False}
+
+    def _reset(self) -> None:
+        if self.trace_allocations:
+            self._memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._last = time.perf_counter()
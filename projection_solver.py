@@ -0,0 +1,175 @@
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+from scipy import sparse
+from scipy.sparse.linalg import LinearOperator, cg
+
+from convergence import INFEASIBLE, STOPPED, ConvergenceMonitor, get_reason
+from profiling import SolverProfile
+from theta_kernel import get_free_mask, has_residual
+
+# относительная регуляризация обобщённого гессиана: система ограничений всегда вырождена (сумма ограничений
+# строк с весами omega совпадает с суммой ограничений столбцов), а у строк без активных элементов нулевая диагональ;
+# регуляризация пропорциональна диагонали, так как диагональ ограничений столбцов порядка omega^2 и при малых
+# omega абсолютная регуляризация замедляет метод до линейной сходимости
+REGULARIZATION = 10 ** (-12)
+# параметр условия Армихо и наименьший шаг одномерного поиска
+ARMIJO = 10 ** (-4)
+MIN_STEP = 10 ** (-10)
+# относительный запас на ошибки округления при проверке доказательства несовместности
+ROUNDING = 10 ** (-9)
+
+
+def projection(omega: ndarray,
+               w: ndarray,
+               get_initial_theta: Callable,
+               eps: float = 10 ** (-10),
+               log_step: int = 0,
+               max_it: int = 2_000,
+               initial_theta: ndarray = None,
+               free: ndarray = None,
+               observer: SolverProfile = None,
+               monitor: ConvergenceMonitor = None,
+               should_stop: Callable[[], bool] = None,
+               return_reason: bool = False) -> tuple:
+    """
+    Функция, реализующая метод формирования маршрутной матрицы СеМо
+    с заданным вектором относительных интенсивностей потоков
+    требований полугладким методом Ньютона для задачи квадратичного программирования.
+
+    Ищется ближайшая (в евклидовой норме) к начальной матрица с суммами строк, равными единице,
+    omega * theta = omega, неотрицательными элементами и неизменными фиксированными элементами.
+    Решение прямой задачи выражается через множители Лагранжа u (ограничения строк) и v (ограничения
+    столбцов): theta_ij = max(0, theta0_ij + u_i + omega_i * v_j) для нефиксированных элементов.
+    Двойственная функция выпукла и кусочно-квадратична, её минимум ищется методом Ньютона
+    с обобщённым гессианом A * D * A^T (D - положительные элементы, A - матрица ограничений).
+    Вблизи решения метод сходится сверхлинейно, поэтому обычно достаточно десятков итераций.
+    Система Ньютона решается методом сопряжённых градиентов без построения матрицы: произведение
+    на гессиан и все остальные операции итерации требуют O(m) действий (m - число нефиксированных
+    элементов), поэтому метод применим и при больших разреженных w. Если задача не имеет решения,
+    двойственная функция не ограничена снизу, направление Ньютона становится доказательством
+    несовместности (лемма Фаркаша) и метод завершается с причиной infeasible.
+
+    Алгоритм:
+        Шаг 1. Определяем начальную маршрутную матрицу;
+        Шаг 2. Определяем фиксированные элементы и правые части ограничений для нефиксированных элементов;
+        Шаг 3. Восстанавливаем матрицу по множителям и проверяем условие остановки: если входной и выходной
+        вектора omega и суммы строк с единицей имеют незначительную разницу (eps) или достигнуто
+        максимальное число итераций, то завершаем алгоритм;
+        Шаг 4. Находим направление Ньютона для множителей (сопряжённые градиенты с диагональным предобуславливателем);
+        если оно доказывает несовместность ограничений, то завершаем алгоритм;
+        Шаг 5. Выбираем шаг вдоль направления по условию Армихо и переходим к шагу 3.
+
+    Parameters и Returns совпадают с gradient_descent.gradient_descent.
+    """
+
+    assert sum(omega) == 1, "Сумма вектора omega должна равняться единицы."
+
+    # шаг 1.
+    theta = get_initial_theta(w, omega) if initial_theta is None else np.array(initial_theta, dtype=float)
+
+    # шаг 2.
+    if free is None:
+        free = get_free_mask(theta)
+    n = len(omega)
+    rows, cols = np.nonzero(free)
+    m = len(rows)
+    start = theta[rows, cols]
+    theta[rows, cols] = 0
+    targets = np.concatenate([1 - theta.sum(axis=1), omega - omega.dot(theta)])
+    # сумма нефиксированных элементов любого допустимого решения
+    total = max(float(targets[:n].sum()), 0.)
+    # разреженная матрица ограничений A (2n x m): суммы строк и omega * theta по нефиксированным элементам
+    constraints = sparse.csr_matrix((np.concatenate([np.ones(m), omega[rows]]),
+                                     (np.concatenate([rows, n + cols]), np.tile(np.arange(m), 2))), shape=(2 * n, m))
+    transposed = constraints.T.tocsr()
+    squared = constraints.multiply(constraints).tocsr()
+
+    def get_values(multipliers: ndarray) -> ndarray:
+        return np.maximum(start + transposed.dot(multipliers), 0)
+
+    multipliers = np.zeros(2 * n)
+    values = get_values(multipliers)
+    it = 0
+    errors = []
+    reason = None
+    if observer is not None:
+        observer.start()
+    if monitor is not None:
+        monitor.start()
+
+    while True:
+        # шаг 3.
+        theta[rows, cols] = values
+        out_omega = omega.dot(theta)
+        # в отличие от градиентных методов строки не нормализуются, поэтому их суммы тоже проверяются
+        if not (has_residual(out_omega, omega, eps) or has_residual(theta.sum(axis=1), 1, eps)) or it >= max_it:
+            break
+        if should_stop is not None and should_stop():
+            reason = STOPPED
+            break
+        it += 1
+
+        delta = out_omega - omega
+        errors.append(float(delta.dot(delta)) / 2)
+        if monitor is not None and monitor.update(errors[-1]):
+            break
+        gradient = constraints.dot(values) - targets
+        if observer is not None:
+            observer.lap("delta")
+
+        # шаг 4.
+        active = (values > 0).astype(float)
+        diagonal = squared.dot(active)
+        damping = np.where(diagonal > 0, REGULARIZATION * diagonal, REGULARIZATION)
+
+        def hessian(direction: ndarray) -> ndarray:
+            return constraints.dot(transposed.dot(direction) * active) + damping * direction
+
+        operator = LinearOperator((2 * n, 2 * n), matvec=hessian)
+        preconditioner = LinearOperator((2 * n, 2 * n), matvec=lambda r: r / (diagonal + damping))
+        norm = float(np.linalg.norm(gradient))
+        direction, _ = cg(operator, -gradient, rtol=min(0.1, norm), M=preconditioner)
+        if observer is not None:
+            observer.lap("update")
+        # для любого допустимого x >= 0: direction * targets = (A^T * direction) * x <= max(A^T * direction) * total,
+        # поэтому нарушение этого неравенства доказывает, что задача не имеет решения
+        shift = transposed.dot(direction)
+        bound = float(shift.max(initial=0)) * total
+        margin = ROUNDING * (float(np.abs(shift).max(initial=0)) * total + float(np.abs(direction).dot(np.abs(targets))))
+        if float(direction.dot(targets)) > bound + margin:
+            reason = INFEASIBLE
+            break
+
+        # шаг 5.
+        # шаг принимается по условию Армихо для двойственной функции |values|^2 / 2 - multipliers * targets
+        # или при достаточном уменьшении невязки ограничений: вблизи решения изменение двойственной функции
+        # сравнимо с ошибками округления и условие Армихо перестаёт выполняться
+        slope = float(gradient.dot(direction))
+        step = 1.
+        while True:
+            candidate_values = get_values(multipliers + step * direction)
+            change = (float((candidate_values - values).dot(candidate_values + values)) / 2
+                      - step * float(direction.dot(targets)))
+            if change <= ARMIJO * step * slope or step < MIN_STEP:
+                break
+            if np.linalg.norm(constraints.dot(candidate_values) - targets) <= (1 - ARMIJO * step) * norm:
+                break
+            step /= 2
+        multipliers, values = multipliers + step * direction, candidate_values
+        if observer is not None:
+            observer.lap("line_search")
+            observer.iteration(it, errors[-1], delta, step)
+
+        if log_step and it % log_step == 0:
+            print(f"Итерация {it}:")
+            print("Полученная омега:", out_omega)
+            print("Theta\n", theta, "\n")
+
+    converged = not has_residual(out_omega, omega, eps) and not has_residual(theta.sum(axis=1), 1, eps)
+    reason = get_reason(converged, monitor, reason)
+    if return_reason:
+        return theta, out_omega, errors, it, reason
+
+    return theta, out_omega, errors, it
@@ -0,0 +1,127 @@
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+
+import numpy as np
+from numpy import ndarray
+
+from initial_theta import DETERMINISTIC_INITS, INITS, get_random_initial_theta
+from solvers import GRADIENT_METHODS, METHODS
+from theta_kernel import has_residual
+
+
+def get_strategies(perturbations: int = 2, methods=GRADIENT_METHODS, seed: int = 0) -> dict[str, tuple]:
+    """
+    Набор стратегий для гонки: каждый метод с равномерной, "умной" и perturbations
+    случайно возмущёнными начальными матрицами.
+
+    Returns:
+        Словарь вида {"gradient/uniform": (метод, функция начальной матрицы), ...}.
+    """
+    inits = {init: INITS[init] for init in DETERMINISTIC_INITS}
+    for k in range(perturbations):
+        inits[f"random{k}"] = partial(get_random_initial_theta, seed=seed + k)
+
+    return {f"{method}/{init}": (METHODS[method], get_initial_theta)
+            for method in methods for init, get_initial_theta in inits.items()}
+
+
+def race(omega: ndarray,
+         w: ndarray,
+         strategies: dict[str, tuple] = None,
+         eps: float = 10 ** (-10),
+         max_it: int = 2_000,
+         workers: int = None) -> tuple[ndarray, ndarray, list[float], int, str | None]:
+    """
+    Одновременный запуск нескольких стратегий (метод, начальная матрица) для одной задачи.
+    Возвращается первое решение, достигшее точности eps; остальные запуски останавливаются
+    на ближайшей итерации: методы опрашивают общий флаг остановки через параметр should_stop.
+
+    Запуски выполняются в потоках, поэтому одновременно исполняется только код NumPy, освобождающий GIL.
+    При небольших n (десятки узлов) итерация состоит из коротких вызовов NumPy и кода Python, и потоки
+    чередуются, а не работают параллельно: гонка выигрывает только за счёт досрочной остановки проигравших
+    запусков по сравнению с последовательным перебором стратегий до первого сошедшегося. Параллельное
+    ускорение возможно лишь при больших n (сотни узлов), когда время итерации занимают операции с матрицами,
+    и при нескольких процессорах.
+
+    Parameters:
+        omega: вектор относительных интенсивностей потоков
+        w: матрица смежности, определяющая топологию сети обслуживания
+        strategies: стратегии вида {имя: (метод, функция начальной матрицы)}, по умолчанию get_strategies()
+        eps: точность определения вектора omega уравнением omega = omega * theta
+        max_it: максимальное число итераций каждого запуска
+        workers: число потоков, по умолчанию по числу стратегий
+
+    Returns:
+        Маршрутная матрица, вектор интенсивностей потоков, ошибки и число итераций победившего запуска
+        и имя победившей стратегии. Если ни один запуск не сошёлся, возвращается запуск с наименьшей
+        последней ошибкой, а имя стратегии равно None.
+    """
+
+    if strategies is None:
+        strategies = get_strategies()
+
+    stop = threading.Event()
+
+    def run(method, get_initial_theta):
+        result = method(omega, w, get_initial_theta, eps=eps, max_it=max_it, should_stop=stop.is_set)
+        if not has_residual(result[1], omega, eps):
+            stop.set()
+        return result
+
+    winner, best = None, None
+    with ThreadPoolExecutor(max_workers=workers or len(strategies)) as executor:
+        futures = {executor.submit(run, *strategy): name for name, strategy in strategies.items()}
+        for future in as_completed(futures):
+            result = future.result()
+            if not has_residual(result[1], omega, eps):
+                winner, best = futures[future], result
+                stop.set()
+                break
+            if best is None or _last_error(result) < _last_error(best):
+                best = result
+
+    return *best, winner
+
+
+def _last_error(result: tuple) -> float:
+    errors = result[2]
+    return errors[-1] if len(errors) else 0.
+
+
+def get_topology_class(w: ndarray) -> str:
+    """Класс топологии для статистики гонок: размерность и плотность матрицы смежности."""
+    n = len(w)
+    return f"n={n} density={np.count_nonzero(w) / n ** 2:.1f}"
+
+
+class RaceStats:
+    """Статистика побед стратегий по классам топологий, по которой выбирается стратегия по умолчанию."""
+
+    def __init__(self):
+        self.wins = defaultdict(Counter)
+        self.races = Counter()
+
+    def update(self, topology_class: str, winner: str | None) -> None:
+        self.races[topology_class] += 1
+        if winner is not None:
+            self.wins[topology_class][winner] += 1
+
+    def merge(self, other: "RaceStats") -> None:
+        self.races.update(other.races)
+        for topology_class, wins in other.wins.items():
+            self.wins[topology_class].update(wins)
+
+    def best(self, topology_class: str) -> str | None:
+        """Стратегия, чаще других побеждавшая для данного класса топологий."""
+        wins = self.wins.get(topology_class)
+        return wins.most_common(1)[0][0] if wins else None
+
+    def __str__(self):
+        lines = []
+        for topology_class in sorted(self.races):
+            wins = ", ".join(f"{name}: {count}" for name, count in self.wins[topology_class].most_common())
+            lines.append(f"{topology_class}: гонок {self.races[topology_class]}, победы - {wins or 'нет'}")
+
+        return "\n".join(lines)
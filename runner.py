@@ -0,0 +1,145 @@
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import numpy as np
+from numpy import ndarray
+
+from convergence import CONVERGED, ConvergenceMonitor
+from feasibility import PrescreenStats, check_feasibility
+from file_utils import save_list_in_file
+from generators import get_random_w
+from initial_theta import DETERMINISTIC_INITS, INITS
+from profiling import SolverProfile
+from solvers import GRADIENT_METHODS, METHODS
+from streaming_stats import StreamingStats
+
+REJECTED = "rejected"
+
+
+def get_task_seed(seed: int, omega_index: int, step: int) -> int:
+    """Детерминированное зерно генератора для топологии с номером step при векторе omega с номером omega_index."""
+    return int(np.random.SeedSequence([seed, omega_index, step]).generate_state(1)[0])
+
+
+def run_task(task: tuple, observer: SolverProfile = None, results: StreamingStats = None) -> tuple[int, str]:
+    """
+    Решение одной задачи сетки эксперимента.
+    Топология восстанавливается по зерну задачи, поэтому не зависит от того, в каком процессе выполняется задача.
+    Если включена предварительная проверка и задача заведомо не имеет решения, метод не запускается,
+    а число итераций считается равным max_iter. Если включено досрочное прерывание, метод останавливается
+    при застое или расхождении ошибки (convergence.ConvergenceMonitor). Если задана потоковая статистика results,
+    в ней учитываются число итераций, время и последняя ошибка решения.
+
+    Returns:
+        Число итераций и причина завершения: REJECTED, если задача отброшена предварительной проверкой,
+        иначе одна из причин convergence (converged, stagnated, diverged, max_it).
+    """
+    (_, _, method, init), omega, task_seed, max_iter, prescreen, early_abort = task
+    random.seed(task_seed)
+    w = get_random_w(len(omega))
+    if prescreen and check_feasibility(omega, w) is not None:
+        return max_iter, REJECTED
+
+    monitor = ConvergenceMonitor() if early_abort else None
+    solve = METHODS[method] if results is None else partial(results.solve, METHODS[method])
+    _, _, _, it, reason = solve(omega, w, INITS[init], max_it=max_iter, observer=observer, monitor=monitor,
+                                return_reason=True)
+    return it, reason
+
+
+def _run_chunk(chunk: list[tuple], profile: bool) -> tuple[list[tuple[tuple, tuple[int, str]]], SolverProfile,
+                                                           StreamingStats]:
+    observer = SolverProfile() if profile else None
+    results = StreamingStats(chunk[0][3])
+    return [(task[0], run_task(task, observer, results)) for task in chunk], observer, results
+
+
+def run_general(omegas: list[ndarray],
+                count: int,
+                workers: int = None,
+                seed: int = 0,
+                max_iter: int = 2_000,
+                chunk_size: int = 64,
+                directory: str = "data",
+                prescreen: bool = True,
+                profile: bool = False,
+                early_abort: bool = True,
+                summary_interval: float = 60.) -> dict[str, list[int]]:
+    """
+    Параллельный аналог main.general: сетка (omega, топология, метод, начальная матрица)
+    распределяется между процессами ProcessPoolExecutor.
+
+    Parameters:
+        omegas: список векторов относительных интенсивностей потоков
+        count: число случайных топологий для каждого вектора omega
+        workers: число процессов, по умолчанию os.cpu_count()
+        seed: зерно эксперимента, результаты не зависят от числа процессов
+        max_iter: максимальное число итераций методов
+        chunk_size: число задач, передаваемых процессу за один раз
+        directory: каталог, в который сохраняются результаты (подкаталоги gradient и conjugate)
+        prescreen: пропускать задачи, отброшенные проверкой feasibility.check_feasibility
+        profile: собрать профиль итераций (profiling.SolverProfile) по всем процессам и вывести его
+        early_abort: прерывать методы при застое или расхождении ошибки (convergence.ConvergenceMonitor)
+        summary_interval: интервал в секундах, с которым выводится промежуточная потоковая статистика
+        (streaming_stats.StreamingStats) по группам (метод, начальная матрица, n); None - только итоговая
+
+    Returns:
+        Словарь со списками итераций с ключами вида "gradient/its" и "gradient/opt_its".
+    """
+
+    tasks = []
+    for omega_index, omega in enumerate(omegas):
+        for step in range(count):
+            task_seed = get_task_seed(seed, omega_index, step)
+            for method in GRADIENT_METHODS:
+                for init in DETERMINISTIC_INITS:
+                    tasks.append(((omega_index, step, method, init), omega, task_seed, max_iter, prescreen,
+                                  early_abort))
+
+    its = {}
+    reasons = {}
+    stats = PrescreenStats()
+    summary = SolverProfile()
+    online = StreamingStats(max_iter)
+    printed = time.monotonic()
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = [executor.submit(_run_chunk, chunk, profile) for chunk in chunks]
+        for future in as_completed(futures):
+            chunk_its, observer, chunk_results = future.result()
+            online.merge(chunk_results)
+            for key, (it, reason) in chunk_its:
+                its[key] = it
+                reasons[key] = reason
+                stats.update(reason if reason == REJECTED else None, max_iter)
+            if observer is not None:
+                summary.merge(observer)
+            print("\r" + f"{len(its)}/{len(tasks)}", end="")
+            if summary_interval is not None and time.monotonic() - printed >= summary_interval:
+                print("\n" + online.summary())
+                printed = time.monotonic()
+    print()
+    print(online.summary(histograms=True))
+    if prescreen:
+        print(stats)
+    if profile:
+        print(summary.report())
+    print(", ".join(f"{reason}: {count}" for reason, count in Counter(reasons.values()).most_common()))
+
+    results = {f"{method}/{name}": [] for method in GRADIENT_METHODS for name in ("its", "opt_its")}
+    for omega_index in range(len(omegas)):
+        for step in range(count):
+            for method in GRADIENT_METHODS:
+                keys = (omega_index, step, method, "uniform"), (omega_index, step, method, "smart")
+                if all(reasons[key] == CONVERGED for key in keys):
+                    results[f"{method}/its"].append(its[keys[0]])
+                    results[f"{method}/opt_its"].append(its[keys[1]])
+
+    for key, values in results.items():
+        save_list_in_file(values, f"{directory}/{key}.txt")
+
+    return results
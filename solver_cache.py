@@ -0,0 +1,160 @@
+import hashlib
+import os
+from collections import OrderedDict
+from functools import partial
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+
+class SolverCache:
+    """
+    Кэш результатов методов формирования маршрутной матрицы.
+    Ключ - хэш содержимого omega и w вместе с полными именами (модуль и qualname) метода и функции
+    начальной матрицы, eps и max_it. Для functools.partial учитываются исходная функция и её аргументы.
+    Лямбда-функции и локальные функции нельзя однозначно идентифицировать: их результаты не кэшируются,
+    если не задано явное имя (параметр name).
+    Результаты хранятся в памяти (LRU с ограничением по числу записей) и, если задан каталог,
+    на диске в виде файлов .npz, поэтому повторный прогон эксперимента решает только новые задачи.
+
+    Parameters:
+        maxsize: максимальное число результатов, хранящихся в памяти
+        directory: каталог для хранения результатов на диске, None - только в памяти
+    """
+
+    def __init__(self, maxsize: int = 1024, directory: str = None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self._memory = OrderedDict()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def solve(self,
+              method: Callable,
+              omega: ndarray,
+              w: ndarray,
+              get_initial_theta: Callable,
+              eps: float = 10 ** (-10),
+              max_it: int = 2_000,
+              name: str = None) -> tuple[ndarray, ndarray, list[float], int]:
+        """
+        Результат method(omega, w, get_initial_theta, eps=eps, max_it=max_it) из кэша или с вычислением.
+        name - явное имя функции начальной матрицы (например, для лямбда-функции), используемое в ключе.
+        """
+        key = get_key(method, omega, w, get_initial_theta, eps, max_it, name)
+        if key is None:
+            self.uncached += 1
+            return method(omega, w, get_initial_theta, eps=eps, max_it=max_it)
+
+        if key in self._memory:
+            self.hits += 1
+            self._memory.move_to_end(key)
+            return _copy(self._memory[key])
+
+        result = self._load(key)
+        if result is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            result = method(omega, w, get_initial_theta, eps=eps, max_it=max_it)
+            self._save(key, result)
+
+        self._memory[key] = _copy(result)
+        if len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+        return result
+
+    def wrap(self, method: Callable) -> Callable:
+        """
+        Функция с сигнатурой method, результаты которой берутся из кэша. Если задано логирование или
+        дополнительные параметры (initial_theta, free, observer, monitor, optimizer, return_reason и т.п.),
+        кэш не используется.
+        """
+        def cached(omega, w, get_initial_theta, eps=10 ** (-10), log_step=0, max_it=2_000, **kwargs):
+            if log_step or any(value is not None and value is not False for value in kwargs.values()):
+                self.uncached += 1
+                return method(omega, w, get_initial_theta, eps=eps, log_step=log_step, max_it=max_it, **kwargs)
+            return self.solve(method, omega, w, get_initial_theta, eps, max_it)
+
+        return cached
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "uncached": self.uncached,
+                "size": len(self._memory)}
+
+    def clear(self) -> None:
+        """Очистка кэша в памяти; файлы на диске сохраняются."""
+        self._memory.clear()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _load(self, key: str):
+        if not self.directory or not os.path.exists(self._path(key)):
+            return None
+
+        with np.load(self._path(key)) as data:
+            return data["theta"], data["out_omega"], list(data["errors"]), int(data["it"])
+
+    def _save(self, key: str, result: tuple) -> None:
+        if not self.directory:
+            return
+
+        theta, out_omega, errors, it = result
+        # запись через временный файл, чтобы прерванный прогон не оставил повреждённый результат
+        temp = self._path(key) + ".tmp.npz"
+        np.savez(temp, theta=theta, out_omega=out_omega, errors=np.array(errors, dtype=float), it=it)
+        os.replace(temp, self._path(key))
+
+
+def get_callable_id(function: Callable) -> str | None:
+    """
+    Однозначное имя функции: модуль и qualname, для functools.partial - имя исходной функции и её аргументы.
+    Для лямбда-функций, локальных функций и прочих объектов без такого имени возвращается None.
+    """
+    if isinstance(function, partial):
+        inner = get_callable_id(function.func)
+        if inner is None:
+            return None
+        return f"{inner}{function.args!r}{sorted(function.keywords.items())!r}"
+
+    module = getattr(function, "__module__", None)
+    qualname = getattr(function, "__qualname__", None)
+    if module is None or qualname is None or "<lambda>" in qualname or "<locals>" in qualname:
+        return None
+    return f"{module}.{qualname}"
+
+
+def get_key(method: Callable,
+            omega: ndarray,
+            w: ndarray,
+            get_initial_theta: Callable,
+            eps: float,
+            max_it: int,
+            name: str = None) -> str | None:
+    """
+    Хэш содержимого задачи и параметров метода. Если метод или функцию начальной матрицы (при отсутствии
+    явного имени name) нельзя однозначно идентифицировать, возвращается None.
+    """
+    method_id = get_callable_id(method)
+    init_id = name if name is not None else get_callable_id(get_initial_theta)
+    if method_id is None or init_id is None:
+        return None
+
+    omega, w = np.asarray(omega, dtype=float), np.asarray(w, dtype=float)
+    h = hashlib.sha256()
+    h.update(repr((method_id, init_id, float(eps), int(max_it), w.shape)).encode())
+    h.update(omega.tobytes())
+    h.update(w.tobytes())
+    return h.hexdigest()
+
+
+def _copy(result: tuple) -> tuple:
+    theta, out_omega, errors, it = result
+    return np.copy(theta), np.copy(out_omega), list(errors), it
@@ -0,0 +1,8 @@
+from conjugate_gradient import conjugate
+from gradient_descent import gradient_descent
+from projection_solver import projection
+
+# реестр методов формирования маршрутной матрицы: имя метода (аргументы командной строки, ключи результатов) -> функция
+METHODS = {"gradient": gradient_descent, "conjugate": conjugate, "projection": projection}
+# градиентные методы: общая схема итерации (theta_solver.ThetaSolver, jit_backend) и исходный набор экспериментов
+GRADIENT_METHODS = ("gradient", "conjugate")
@@ -0,0 +1,140 @@
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+from scipy import sparse
+
+from theta_kernel import shift_negative
+
+
+def get_random_sparse_w(n: int, degree: int = 3, seed: int = None) -> sparse.csr_matrix:
+    """Случайная разреженная матрица смежности: в каждой строке от 1 до degree исходящих маршрутов."""
+    rng = np.random.default_rng(seed)
+    rows = np.repeat(np.arange(n), degree)
+    cols = rng.integers(0, n, n * degree)
+    # первый маршрут каждой строки сохраняется всегда, остальные - с вероятностью 1/2
+    keep = (np.arange(n * degree) % degree == 0) | (rng.random(n * degree) < 0.5)
+    w = sparse.csr_matrix((np.ones(keep.sum()), (rows[keep], cols[keep])), shape=(n, n))
+    w.data[:] = 1
+    return w
+
+
+def get_sparse_uniform_initial_theta(w: sparse.spmatrix, omega: ndarray) -> sparse.csr_matrix:
+    theta = _as_csr(w)
+    theta.data = 1 / np.repeat(np.diff(theta.indptr), np.diff(theta.indptr))
+    return theta
+
+
+def get_sparse_smart_initial_theta(w: sparse.spmatrix, omega: ndarray) -> sparse.csr_matrix:
+    theta = _as_csr(w)
+    theta.data = omega[theta.indices].astype(float)
+    theta.data /= np.add.reduceat(theta.data, theta.indptr[:-1])[_get_rows(theta)]
+    return theta
+
+
+def sparse_gradient_descent(omega: ndarray,
+                            w: sparse.spmatrix,
+                            get_initial_theta: Callable = get_sparse_uniform_initial_theta,
+                            eps: float = 10 ** (-10),
+                            log_step: int = 0,
+                            max_it: int = 2_000) -> tuple[sparse.csr_matrix, ndarray, list[float], int]:
+    """
+    Метод градиентного спуска для разреженной маршрутной матрицы (см. gradient_descent.gradient_descent).
+    Все изменения, сдвиг и нормализация выполняются только над ненулевыми элементами матрицы смежности,
+    поэтому стоимость итерации пропорциональна числу маршрутов, а не n^2.
+
+    Parameters:
+        omega: вектор относительных интенсивностей потоков
+        w: матрица смежности в формате scipy.sparse (или плотный массив)
+        get_initial_theta: функция для определения начальной разреженной маршрутной матрицы
+        eps: точность определения вектора omega уравнением omega = omega * theta
+        log_step: шаг логирования, если параметр равен 0 - логирование не производится
+        max_it: максимальное число итераций
+
+    Returns:
+        Полученная маршрутная матрица в формате CSR;
+        Соответствующий вектор интенсивностей потоков;
+        Массив, содержащий значения ошибок в процессе формирования матрицы;
+        Число пройденных итераций.
+
+    """
+    return _descent(omega, w, get_initial_theta, False, eps, log_step, max_it)
+
+
+def sparse_conjugate(omega: ndarray,
+                     w: sparse.spmatrix,
+                     get_initial_theta: Callable = get_sparse_uniform_initial_theta,
+                     eps: float = 10 ** (-10),
+                     log_step: int = 0,
+                     max_it: int = 2_000) -> tuple[sparse.csr_matrix, ndarray, list[float], int]:
+    """
+    Метод сопряженных градиентов для разреженной маршрутной матрицы (см. conjugate_gradient.conjugate).
+    Параметры и возвращаемые значения совпадают с sparse_gradient_descent.
+    """
+    return _descent(omega, w, get_initial_theta, True, eps, log_step, max_it)
+
+
+def _descent(omega: ndarray,
+             w: sparse.spmatrix,
+             get_initial_theta: Callable,
+             conjugate: bool,
+             eps: float,
+             log_step: int,
+             max_it: int) -> tuple[sparse.csr_matrix, ndarray, list[float], int]:
+    assert np.isclose(omega.sum(), 1), "Сумма вектора omega должна равняться единицы."
+
+    theta = get_initial_theta(w, omega)
+    n = theta.shape[0]
+    rows, cols, data = _get_rows(theta), theta.indices, theta.data
+    assert np.all(np.diff(theta.indptr) > 0), "В каждой строке матрицы смежности должен быть хотя бы один маршрут."
+
+    free = (data != 0) & (data != 1)
+    # элементы вне структуры матрицы - фиксированные нули
+    floor = 0 if theta.nnz < n * n else np.inf
+    omega_rows = omega[rows]
+
+    def product(values: ndarray) -> ndarray:
+        return np.bincount(cols, weights=omega_rows * values, minlength=n)
+
+    it = 0
+    errors = []
+    out_omega = product(data)
+    delta = out_omega - omega
+    while np.any(np.abs(delta) > eps) and it < max_it:
+        it += 1
+
+        delta_prev = delta
+        out_omega = product(data)
+        delta = out_omega - omega
+        errors.append(float(delta.dot(delta)) / 2)
+
+        weight_deltas = np.where(free, omega_rows * delta[cols], 0)
+        if conjugate:
+            p = delta + delta.dot(delta) / delta_prev.dot(delta_prev) * delta
+            direction = np.where(free, p[cols], 0)
+            slope = product(direction)
+            residual = product(data - weight_deltas) - omega
+            curvature = slope.dot(slope)
+            alpha = max(float(residual.dot(slope) / curvature), 0.) if curvature else 0.
+            weight_deltas += alpha * direction
+
+        data -= weight_deltas
+        shift_negative(data, free, floor)
+        data /= np.add.reduceat(data, theta.indptr[:-1])[rows]
+
+        if log_step and it % log_step == 0:
+            print(f"Итерация {it}: ошибка {errors[-1]}")
+
+    return theta, out_omega, errors, it
+
+
+def _as_csr(w) -> sparse.csr_matrix:
+    theta = sparse.csr_matrix(w, dtype=float, copy=True)
+    theta.eliminate_zeros()
+    theta.sum_duplicates()
+    theta.sort_indices()
+    return theta
+
+
+def _get_rows(theta: sparse.csr_matrix) -> ndarray:
+    return np.repeat(np.arange(theta.shape[0]), np.diff(theta.indptr))
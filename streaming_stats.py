@@ -0,0 +1,224 @@
+import math
+import time
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+
+class RunningMoments:
+    """Потоковые среднее, дисперсия (алгоритм Уэлфорда), минимум и максимум; объединение - формулой Чана."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.
+        self.m2 = 0.
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "RunningMoments") -> None:
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.
+
+
+class QuantileSketch:
+    """
+    Скетч квантилей неотрицательных величин с относительной точностью accuracy (по схеме DDSketch):
+    значение x попадает в корзину ceil(log_gamma(x)), gamma = (1 + accuracy) / (1 - accuracy), нули учитываются
+    отдельно. Число корзин ограничено max_buckets (при превышении объединяются корзины наименьших значений),
+    поэтому память постоянна, а объединение скетчей сводится к сложению счётчиков.
+    """
+
+    def __init__(self, accuracy: float = 0.01, max_buckets: int = 2048):
+        self.accuracy = accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value, self.gamma))
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self._collapse()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        assert self.gamma == other.gamma, "Объединяемые скетчи должны иметь одинаковую точность."
+        self.count += other.count
+        self.zeros += other.zeros
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self._collapse()
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def _collapse(self) -> None:
+        while len(self.buckets) > self.max_buckets:
+            smallest, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(smallest)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами (линейными или, при log=True, по десятичному логарифму значения)."""
+
+    def __init__(self, low: float, high: float, bins: int = 20, log: bool = False):
+        self.edges = np.linspace(low, high, bins + 1)
+        self.log = log
+        self.counts = np.zeros(bins + 2, dtype=np.int64)  # первый и последний счётчики - выход за границы
+
+    def add(self, value: float) -> None:
+        if self.log:
+            value = math.log10(value) if value > 0 else -math.inf
+        self.counts[np.searchsorted(self.edges, value, side="right")] += 1
+
+    def merge(self, other: "Histogram") -> None:
+        assert np.array_equal(self.edges, other.edges) and self.log == other.log, "Границы гистограмм должны совпадать."
+        self.counts += other.counts
+
+    def bins(self) -> list[tuple[float, float, int]]:
+        """
+        Корзины гистограммы в виде (нижняя граница, верхняя граница, число значений) в единицах исходной
+        величины; первая и последняя корзины - выход за границы (-inf и inf).
+        """
+        edges = 10 ** self.edges if self.log else self.edges
+        lows = [0. if self.log else -math.inf, *edges]
+        highs = [*edges, math.inf]
+        return [(float(low), float(high), int(count)) for low, high, count in zip(lows, highs, self.counts)]
+
+    def __str__(self):
+        return " ".join(f"[{low:.3g}, {high:.3g}): {count}" for low, high, count in self.bins() if count)
+
+
+class MetricSummary:
+    """Потоковая сводка одной величины: моменты, скетч квантилей и гистограмма."""
+
+    def __init__(self, low: float, high: float, bins: int = 20, log: bool = False):
+        self.moments = RunningMoments()
+        self.sketch = QuantileSketch()
+        self.histogram = Histogram(low, high, bins, log)
+
+    def add(self, value: float) -> None:
+        self.moments.add(value)
+        self.sketch.add(value)
+        self.histogram.add(value)
+
+    def merge(self, other: "MetricSummary") -> None:
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.histogram.merge(other.histogram)
+
+    def quantile(self, q: float) -> float:
+        """Квантиль по скетчу, ограниченный наблюдавшимися минимумом и максимумом (оценка скетча может их превышать)."""
+        value = self.sketch.quantile(q)
+        return value if math.isnan(value) else min(max(value, self.moments.min), self.moments.max)
+
+    def __str__(self):
+        q = [self.quantile(p) for p in (0.5, 0.9, 0.99)]
+        return (f"mean {self.moments.mean:.4g} sd {math.sqrt(self.moments.variance):.4g} "
+                f"p50 {q[0]:.4g} p90 {q[1]:.4g} p99 {q[2]:.4g} max {self.moments.max:.4g}")
+
+
+class StreamingStats:
+    """
+    Потоковая статистика результатов эксперимента по группам (method, init, n): для числа итераций,
+    времени решения и последней ошибки хранятся среднее и дисперсия, квантили и гистограммы.
+    Память зависит только от числа групп, частичные результаты процессов объединяются методом merge.
+
+    Parameters:
+        max_it: максимальное число итераций, определяет границы гистограммы итераций
+    """
+
+    def __init__(self, max_it: int = 2_000):
+        self.max_it = max_it
+        self.groups = {}
+
+    def add(self, method: str, init: str, n: int, it: int, wall_time: float, error: float) -> None:
+        group = self.groups.get((method, init, n))
+        if group is None:
+            group = self.groups[(method, init, n)] = self._new_group()
+        group["it"].add(it)
+        group["time"].add(wall_time)
+        group["error"].add(error)
+
+    def solve(self,
+              method: Callable,
+              omega: ndarray,
+              w: ndarray,
+              get_initial_theta: Callable,
+              **kwargs) -> tuple:
+        """
+        Результат method(omega, w, get_initial_theta, **kwargs) с учётом числа итераций, времени решения
+        и последней ошибки в группе (имя метода, имя функции начальной матрицы, n).
+        Результат возвращается без изменений (в том числе с причиной завершения при return_reason=True).
+        """
+        start = time.perf_counter()
+        result = method(omega, w, get_initial_theta, **kwargs)
+        errors, it = result[2], result[3]
+        init = getattr(get_initial_theta, "__name__", "custom").removeprefix("get_").removesuffix("_initial_theta")
+        self.add(method.__name__, init, len(omega), it, time.perf_counter() - start, errors[-1] if errors else 0.)
+        return result
+
+    def merge(self, other: "StreamingStats") -> None:
+        for key, metrics in other.groups.items():
+            group = self.groups.setdefault(key, self._new_group())
+            for name, summary in metrics.items():
+                group[name].merge(summary)
+
+    def histograms(self) -> dict[tuple[str, str, int], dict[str, list[tuple[float, float, int]]]]:
+        """Гистограммы по группам: {(method, init, n): {величина: [(нижняя граница, верхняя граница, число), ...]}}."""
+        return {key: {name: metric.histogram.bins() for name, metric in group.items()}
+                for key, group in self.groups.items()}
+
+    def summary(self, histograms: bool = False) -> str:
+        """Сводка по группам; при histograms=True для каждой величины выводятся непустые корзины гистограммы."""
+        lines = []
+        for (method, init, n), group in sorted(self.groups.items()):
+            lines.append(f"{method}/{init} n={n}: решений {group['it'].moments.count}")
+            for name, metric in group.items():
+                lines.append(f"\t{name:<6} {metric}")
+                if histograms:
+                    lines.append(f"\t{'':<6} {metric.histogram}")
+
+        return "\n".join(lines)
+
+    def _new_group(self) -> dict[str, MetricSummary]:
+        return {
+            "it": MetricSummary(0, self.max_it),
+            "time": MetricSummary(-6, 2, 16, log=True),
+            "error": MetricSummary(-30, 0, 30, log=True),
+        }
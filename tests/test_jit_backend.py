@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+import jit_backend
+from benchmark_suite import get_problem
+from conjugate_gradient import conjugate
+from gradient_descent import gradient_descent
+from initial_theta import get_smart_initial_theta, get_uniform_initial_theta
+from profiling import SolverProfile
+
+REFERENCES = {"gradient": gradient_descent, "conjugate": conjugate}
+MAX_IT = 300
+
+
+def get_problems(n, count=5, seed=0):
+    rng = np.random.default_rng(seed)
+    return [get_problem(n, 0.5, 0., rng) for _ in range(count)]
+
+
+def assert_same_result(expected, actual):
+    theta, out_omega, errors, it = expected
+    kernel_theta, kernel_omega, kernel_errors, kernel_it = actual
+    assert kernel_it == it
+    np.testing.assert_allclose(kernel_theta, theta, rtol=0, atol=10 ** (-10))
+    np.testing.assert_allclose(kernel_omega, out_omega, rtol=0, atol=10 ** (-10))
+    np.testing.assert_allclose(kernel_errors, errors, rtol=10 ** (-6), atol=10 ** (-20))
+
+
+def solve_python(monkeypatch, method, *args, **kwargs):
+    # ядра без компиляции: при установленной numba исходная функция доступна как py_func
+    loop = jit_backend.LOOPS[method]
+    monkeypatch.setitem(jit_backend.LOOPS, method, getattr(loop, "py_func", loop))
+    return jit_backend.solve_with_kernel(method, *args, **kwargs)
+
+
+@pytest.mark.parametrize("method", sorted(REFERENCES))
+@pytest.mark.parametrize("n", [4, 8])
+@pytest.mark.parametrize("get_initial_theta", [get_uniform_initial_theta, get_smart_initial_theta])
+def test_python_kernel_matches_numpy(monkeypatch, method, n, get_initial_theta):
+    for omega, w in get_problems(n):
+        expected = REFERENCES[method](omega, w, get_initial_theta, max_it=MAX_IT)
+        actual = solve_python(monkeypatch, method, omega, w, get_initial_theta, max_it=MAX_IT)
+        assert_same_result(expected, actual)
+
+
+@pytest.mark.parametrize("method", sorted(REFERENCES))
+def test_python_kernel_respects_free_mask(monkeypatch, method):
+    omega, w = get_problems(6, count=1, seed=1)[0]
+    initial_theta = get_uniform_initial_theta(w, omega)
+    free = initial_theta != 0
+    free[0] = False
+
+    expected = REFERENCES[method](omega, w, get_uniform_initial_theta, max_it=MAX_IT,
+                                  initial_theta=initial_theta, free=free)
+    actual = solve_python(monkeypatch, method, omega, w, get_uniform_initial_theta, max_it=MAX_IT,
+                          initial_theta=initial_theta, free=free)
+    assert_same_result(expected, actual)
+    np.testing.assert_array_equal(actual[0][0], initial_theta[0])
+
+
+@pytest.mark.parametrize("method", sorted(REFERENCES))
+@pytest.mark.parametrize("n", [4, 8, 16])
+def test_compiled_kernel_matches_numpy(method, n):
+    pytest.importorskip("numba")
+    assert jit_backend.NUMBA_AVAILABLE
+
+    for omega, w in get_problems(n):
+        expected = REFERENCES[method](omega, w, get_uniform_initial_theta, max_it=MAX_IT)
+        actual = jit_backend.solve_with_kernel(method, omega, w, get_uniform_initial_theta, max_it=MAX_IT)
+        assert_same_result(expected, actual)
+
+
+def test_wrappers_fall_back_to_numpy_for_unsupported_options():
+    omega, w = get_problems(4, count=1)[0]
+    profile = SolverProfile()
+
+    expected = gradient_descent(omega, w, get_uniform_initial_theta, max_it=MAX_IT)
+    actual = jit_backend.jit_gradient_descent(omega, w, get_uniform_initial_theta, max_it=MAX_IT, observer=profile)
+    assert_same_result(expected, actual)
+    assert profile.iterations == actual[3]
@@ -0,0 +1,73 @@
+import numpy as np
+from numpy import ndarray
+
+
+def get_free_mask(theta: ndarray) -> ndarray:
+    """
+    Маска элементов маршрутной матрицы, которые могут изменяться.
+    Нулевые и единичные элементы начальной матрицы фиксированы.
+    """
+    return (theta != 0) & (theta != 1)
+
+
+def get_exact_omega(omega: ndarray) -> ndarray:
+    """
+    Копия вектора omega, последний элемент которой поправлен так, чтобы сумма вектора (встроенная sum,
+    как в проверке методов) в точности равнялась единице. Поправка устраняет только ошибки округления.
+    """
+    exact_omega = np.array(omega, dtype=float)
+    for _ in range(3):
+        if sum(exact_omega) == 1:
+            break
+        exact_omega[-1] += 1 - sum(exact_omega)
+
+    return exact_omega
+
+
+def has_residual(out_omega: ndarray, omega: ndarray, eps: float) -> bool:
+    """Проверка того, что хотя бы одна компонента omega отличается от заданной больше чем на eps."""
+    return bool(np.any(np.abs(out_omega - omega) > eps))
+
+
+def apply_update(theta: ndarray, weight_deltas: ndarray, free: ndarray) -> None:
+    """Изменение нефиксированных коэффициентов маршрутной матрицы на месте."""
+    np.subtract(theta, weight_deltas, out=theta, where=free)
+
+
+def shift_negative(theta: ndarray, free: ndarray, floor: float = np.inf) -> None:
+    """
+    Сдвиг нефиксированных элементов маршрутной матрицы при появлении отрицательных значений.
+
+    Повторяет поэлементное правило: элементы обходятся построчно, и к каждому нефиксированному
+    элементу прибавляется удвоенный модуль текущего минимума всей матрицы. Текущий минимум
+    складывается из суффиксного минимума ещё не сдвинутых элементов, минимума фиксированных
+    элементов и минимума уже сдвинутых (они всегда неотрицательны).
+    Параметр floor учитывает фиксированные элементы, не хранящиеся в массиве (например, нули разреженной матрицы).
+    """
+    if theta.min() >= 0:
+        return
+
+    values = theta[free]
+    fixed_values = theta[~free]
+    if fixed_values.size:
+        floor = min(floor, fixed_values.min())
+    suffix = np.minimum.accumulate(values[::-1])[::-1]
+
+    if floor <= 0:
+        # сдвинутые элементы неотрицательны, поэтому минимум определяется только суффиксом и фиксированными
+        values += np.abs(np.minimum(suffix, floor)) * 2
+    else:
+        running = floor
+        for k in range(values.size):
+            values[k] += abs(min(suffix[k], running)) * 2
+            running = min(running, values[k])
+
+    theta[free] = values
+
+
+def normalize_rows(theta: ndarray) -> None:
+    """
+    Нормализация строк маршрутной матрицы на месте.
+    Суммы строк накапливаются последовательно (как встроенная sum), а не попарно, как в np.sum.
+    """
+    theta /= np.cumsum(theta, axis=1)[:, -1:]
@@ -0,0 +1,137 @@
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+from conjugate_gradient import find_alpha
+from theta_kernel import apply_update, shift_negative
+
+METHODS = ("gradient", "conjugate")
+
+
+class ThetaSolver:
+    """
+    Решатель для многократного формирования маршрутных матриц размерности n.
+    Рабочие массивы создаются один раз в конструкторе и переиспользуются на каждой итерации
+    и в каждом следующем решении; результаты совпадают с gradient_descent и conjugate.
+    Временные массивы выделяет только theta_kernel.shift_negative (выборка нефиксированных элементов
+    и суффиксный минимум) и только на итерациях, где в матрице появились отрицательные элементы:
+    вариант без выделения памяти требует больше вызовов NumPy и при небольших n работает медленнее.
+
+    Parameters:
+        n: число систем сети обслуживания
+        method: "gradient" - метод градиентного спуска, "conjugate" - метод сопряженных градиентов
+        eps: точность определения вектора omega уравнением omega = omega * theta
+        max_it: максимальное число итераций
+        keep_errors: число последних сохраняемых значений ошибки, None - сохраняются все значения
+    """
+
+    def __init__(self,
+                 n: int,
+                 method: str = "gradient",
+                 eps: float = 10 ** (-10),
+                 max_it: int = 2_000,
+                 keep_errors: int = None):
+        assert method in METHODS, f"Неизвестный метод: {method}."
+        assert keep_errors is None or keep_errors >= 1, "Число сохраняемых значений ошибки должно быть не меньше 1."
+        self.n = n
+        self.method = method
+        self.eps = eps
+        self.max_it = max_it
+        self.errors = np.empty(max_it if keep_errors is None else min(keep_errors, max_it))
+
+        self.theta = np.empty((n, n))
+        self.free = np.empty((n, n), dtype=bool)
+        self.fixed = np.empty((n, n), dtype=bool)
+        self.weight_deltas = np.empty((n, n))
+        self.direction = np.empty((n, n))
+        self.buffer = np.empty((n, n))
+        self.out_omega = np.empty(n)
+        self.delta = np.empty(n)
+        self.delta_prev = np.empty(n)
+        self.p = np.empty(n)
+        self.residual = np.empty(n)
+        self.slope = np.empty(n)
+
+    def solve(self,
+              omega: ndarray,
+              w: ndarray,
+              get_initial_theta: Callable,
+              initial_theta: ndarray = None,
+              free: ndarray = None) -> tuple[ndarray, ndarray, ndarray, int]:
+        """
+        Формирование маршрутной матрицы для omega и w.
+        Параметры initial_theta и free совпадают с gradient_descent.gradient_descent.
+
+        Returns:
+            Полученная маршрутная матрица (копия);
+            Соответствующий вектор интенсивностей потоков (копия);
+            Массив значений ошибок (все или последние keep_errors значений);
+            Число пройденных итераций.
+        """
+
+        assert sum(omega) == 1, "Сумма вектора omega должна равняться единицы."
+        assert len(omega) == self.n, "Размерность omega не совпадает с размерностью решателя."
+
+        theta, fixed = self.theta, self.fixed
+        weight_deltas, out_omega = self.weight_deltas, self.out_omega
+        delta, delta_prev = self.delta, self.delta_prev
+
+        theta[...] = get_initial_theta(w, omega) if initial_theta is None else initial_theta
+        if free is None:
+            np.not_equal(theta, 0, out=self.free)
+            np.logical_and(self.free, theta != 1, out=self.free)
+        else:
+            self.free[...] = free
+        free = self.free
+        np.logical_not(free, out=fixed)
+
+        it = 0
+        np.dot(omega, theta, out=out_omega)
+        np.subtract(out_omega, omega, out=delta)
+        while np.abs(delta, out=self.residual).max() > self.eps and it < self.max_it:
+            it += 1
+
+            delta, delta_prev = delta_prev, delta
+            np.dot(omega, theta, out=out_omega)
+            np.subtract(out_omega, omega, out=delta)
+            np.outer(omega, delta, out=weight_deltas)
+
+            if self.method == "gradient":
+                error = float(delta.dot(delta)) / 2
+            else:
+                error = sum(map(lambda x: x ** 2, delta)) / 2
+                self._conjugate_step(omega, delta, delta_prev)
+            self.errors[(it - 1) % len(self.errors)] = error
+
+            apply_update(theta, weight_deltas, free)
+            shift_negative(theta, free)
+            np.cumsum(theta, axis=1, out=self.buffer)
+            np.divide(theta, self.buffer[:, -1:], out=theta)
+
+        self.delta, self.delta_prev = delta, delta_prev
+        return np.copy(theta), np.copy(out_omega), self._get_errors(it), it
+
+    def _conjugate_step(self, omega: ndarray, delta: ndarray, delta_prev: ndarray) -> None:
+        weight_deltas, direction, buffer, p = self.weight_deltas, self.direction, self.buffer, self.p
+
+        beta = (np.transpose(delta).dot(delta)) / (np.transpose(delta_prev).dot(delta_prev))
+        np.multiply(beta, delta, out=p)
+        np.add(delta, p, out=p)
+
+        np.copyto(weight_deltas, 0., where=self.fixed)
+        np.copyto(direction, p)
+        np.copyto(direction, 0., where=self.fixed)
+
+        np.subtract(self.theta, weight_deltas, out=buffer)
+        alpha = find_alpha(buffer, omega, np.negative(direction, out=direction), self.residual, self.slope)
+        np.negative(direction, out=direction)
+        weight_deltas += np.multiply(alpha, direction, out=buffer)
+
+    def _get_errors(self, it: int) -> ndarray:
+        size = len(self.errors)
+        if it <= size:
+            return self.errors[:it].copy()
+
+        # кольцевой буфер: возвращаются последние значения в порядке их получения
+        return np.roll(self.errors, -(it % size))
@@ -0,0 +1,53 @@
+from typing import Callable
+
+import numpy as np
+from numpy import ndarray
+
+from initial_theta import get_uniform_initial_theta
+from theta_kernel import get_free_mask, has_residual
+from theta_solver import ThetaSolver
+
+
+class WarmStartSolver:
+    """
+    Решатель для сети с неизменной топологией w и медленно меняющимся вектором omega.
+    Каждая новая задача решается, начиная с последней сошедшейся маршрутной матрицы;
+    маска фиксированных элементов определяется один раз, а рабочие массивы итераций принадлежат
+    решателю theta_solver.ThetaSolver и переиспользуются во всех решениях.
+
+    Parameters:
+        w: матрица смежности, определяющая топологию сети обслуживания
+        method: "gradient" - метод градиентного спуска, "conjugate" - метод сопряженных градиентов
+        get_initial_theta: функция для определения начальной маршрутной матрицы при холодном старте
+        eps: точность определения вектора omega уравнением omega = omega * theta
+        max_it: максимальное число итераций
+    """
+
+    def __init__(self,
+                 w: ndarray,
+                 method: str = "gradient",
+                 get_initial_theta: Callable = get_uniform_initial_theta,
+                 eps: float = 10 ** (-10),
+                 max_it: int = 2_000):
+        self.w = w
+        self.get_initial_theta = get_initial_theta
+        self.eps = eps
+        self.solver = ThetaSolver(len(w), method, eps, max_it)
+        self.theta = None
+        self.free = None
+
+    def solve(self, omega: ndarray) -> tuple[ndarray, ndarray, ndarray, int]:
+        """Решение задачи для нового вектора omega. Возвращает тот же кортеж, что и ThetaSolver.solve."""
+        if self.free is None:
+            self.free = get_free_mask(self.get_initial_theta(self.w, omega))
+
+        theta, out_omega, errors, it = self.solver.solve(omega, self.w, self.get_initial_theta,
+                                                         initial_theta=self.theta, free=self.free)
+        if not has_residual(out_omega, omega, self.eps):
+            self.theta = np.copy(theta)
+
+        return theta, out_omega, errors, it
+
+    def reset(self) -> None:
+        """Сброс сохранённого решения: следующая задача будет решаться с холодного старта."""
+        self.theta = None